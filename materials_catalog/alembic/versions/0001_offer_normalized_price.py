@@ -0,0 +1,52 @@
+"""Add FX rate snapshots and USD-normalized offer prices
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created by Base.metadata.create_all() may already have these
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+
+    if "fx_rates" not in tables:
+        op.create_table(
+            "fx_rates",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("version", sa.String(), nullable=False),
+            sa.Column("currency", sa.String(length=3), nullable=False),
+            sa.Column("usd_per_unit", sa.Float(), nullable=False),
+            sa.Column("loaded_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.UniqueConstraint("version", "currency"),
+        )
+        op.create_index("ix_fx_rates_id", "fx_rates", ["id"])
+        op.create_index("ix_fx_rates_version", "fx_rates", ["version"])
+
+    columns = {column["name"] for column in inspector.get_columns("offers")}
+    with op.batch_alter_table("offers") as batch_op:
+        if "price_usd" not in columns:
+            batch_op.add_column(sa.Column("price_usd", sa.Float(), nullable=True))
+        if "fx_version" not in columns:
+            batch_op.add_column(sa.Column("fx_version", sa.String(), nullable=True))
+
+    indexes = {index["name"] for index in inspector.get_indexes("offers")}
+    if "ix_offers_product_price_usd" not in indexes:
+        op.create_index("ix_offers_product_price_usd", "offers", ["product_id", "price_usd"])
+
+
+def downgrade():
+    op.drop_index("ix_offers_product_price_usd", table_name="offers")
+    with op.batch_alter_table("offers") as batch_op:
+        batch_op.drop_column("fx_version")
+        batch_op.drop_column("price_usd")
+    op.drop_table("fx_rates")
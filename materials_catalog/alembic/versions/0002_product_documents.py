@@ -0,0 +1,31 @@
+"""Add pre-rendered product documents
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created by Base.metadata.create_all() may already have it
+    if "product_documents" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "product_documents",
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), primary_key=True),
+        sa.Column("metric", sa.LargeBinary(), nullable=False),
+        sa.Column("imperial", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table("product_documents")
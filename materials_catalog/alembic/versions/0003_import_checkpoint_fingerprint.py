@@ -0,0 +1,30 @@
+"""Identify the imported file's contents in import checkpoints
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Checkpoints are created by import_catalog.py via Base.metadata.create_all()
+    inspector = sa.inspect(op.get_bind())
+    if "import_checkpoints" not in inspector.get_table_names():
+        return
+    columns = {column["name"] for column in inspector.get_columns("import_checkpoints")}
+    if "fingerprint" not in columns:
+        with op.batch_alter_table("import_checkpoints") as batch_op:
+            batch_op.add_column(sa.Column("fingerprint", sa.String(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("import_checkpoints") as batch_op:
+        batch_op.drop_column("fingerprint")
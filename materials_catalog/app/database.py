@@ -1,7 +1,13 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+import json
+import logging
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,4 +26,175 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Opt-in slow query log: set SLOW_QUERY_LOG to a file path to enable it
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+# Plans are always captured on SQLite. Elsewhere EXPLAIN runs inside the request's
+# transaction, so it is only done on request
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() in ("1", "true", "yes")
+# EXPLAIN ANALYZE runs the query again, so it is only used for SELECTs and only on request
+SLOW_QUERY_ANALYZE = os.getenv("SLOW_QUERY_ANALYZE", "false").lower() in ("1", "true", "yes")
+
+# ASGI scope of the request being served; the router fills in scope["route"]
+current_request_scope = ContextVar("current_request_scope", default=None)
+
+class RequestScopeMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        token = current_request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_request_scope.reset(token)
+
+def _current_route():
+    scope = current_request_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return f"{scope.get('method')} {getattr(route, 'path', scope.get('path'))}"
+
+def _param_shape(parameters):
+    # Types only, never values
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+def _explain(cursor, dialect_name, statement, parameters):
+    if dialect_name == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif not SLOW_QUERY_EXPLAIN:
+        return None
+    elif dialect_name == "postgresql":
+        prefix = "EXPLAIN ANALYZE " if SLOW_QUERY_ANALYZE else "EXPLAIN "
+    elif dialect_name in ("mysql", "mariadb"):
+        prefix = "EXPLAIN "
+    else:
+        return None
+    # A failed statement aborts the whole transaction on PostgreSQL, so the
+    # EXPLAIN gets a savepoint to roll back to
+    savepoint = dialect_name == "postgresql"
+    explain_cursor = cursor.connection.cursor()
+    try:
+        if savepoint:
+            explain_cursor.execute("SAVEPOINT slow_query_explain")
+        explain_cursor.execute(prefix + statement, parameters)
+        plan = [" ".join(str(column) for column in row) for row in explain_cursor.fetchall()]
+        if savepoint:
+            explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    except Exception as e:
+        if savepoint:
+            try:
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            except Exception:
+                # No savepoint outside a transaction, and nothing to roll back either
+                pass
+        return [f"EXPLAIN failed: {e}"]
+    finally:
+        explain_cursor.close()
+
+class SlowQueryLog:
+    def __init__(self, path, threshold_ms=SLOW_QUERY_MS, max_bytes=SLOW_QUERY_LOG_MAX_BYTES,
+                 backups=SLOW_QUERY_LOG_BACKUPS):
+        self.path = path
+        self.threshold = threshold_ms / 1000
+        self.backups = backups
+        self.logger = logging.getLogger(f"slow_queries.{path}")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        if not self.logger.handlers:
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(handler)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None:
+            return
+        duration = time.perf_counter() - started
+        if duration < self.threshold:
+            return
+
+        plan = None
+        if not executemany and statement.lstrip()[:6].upper() == "SELECT":
+            plan = _explain(cursor, conn.dialect.name, statement, parameters)
+        self.logger.info(json.dumps({
+            "ts": datetime.utcnow().isoformat(),
+            "duration_ms": round(duration * 1000, 3),
+            "statement": statement,
+            "params": _param_shape(parameters[0] if executemany and parameters else parameters),
+            "executemany": executemany,
+            "route": _current_route(),
+            "plan": plan,
+        }))
+
+    def files(self):
+        # Current file first, then rotated backups
+        paths = [self.path] + [f"{self.path}.{i}" for i in range(1, self.backups + 1)]
+        return [path for path in paths if os.path.exists(path)]
+
+    def top_offenders(self, limit=20):
+        stats = {}
+        for path in self.files():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    row = stats.setdefault(entry["statement"], {
+                        "statement": entry["statement"],
+                        "calls": 0,
+                        "total_ms": 0.0,
+                        "max_ms": 0.0,
+                        "routes": set(),
+                        "param_shapes": [],
+                        "plan": None,
+                    })
+                    row["calls"] += 1
+                    row["total_ms"] += entry["duration_ms"]
+                    row["max_ms"] = max(row["max_ms"], entry["duration_ms"])
+                    if entry.get("route"):
+                        row["routes"].add(entry["route"])
+                    if entry.get("params") not in row["param_shapes"]:
+                        row["param_shapes"].append(entry.get("params"))
+                    if row["plan"] is None:
+                        row["plan"] = entry.get("plan")
+
+        top = sorted(stats.values(), key=lambda row: row["total_ms"], reverse=True)[:limit]
+        for row in top:
+            row["mean_ms"] = row["total_ms"] / row["calls"]
+            row["routes"] = sorted(row["routes"])
+        return top
+
+slow_query_log = None
+
+def enable_slow_query_log(path, threshold_ms=SLOW_QUERY_MS, bind=engine):
+    global slow_query_log
+    disable_slow_query_log(bind)
+    slow_query_log = SlowQueryLog(path, threshold_ms)
+    event.listen(bind, "before_cursor_execute", slow_query_log.before_cursor_execute)
+    event.listen(bind, "after_cursor_execute", slow_query_log.after_cursor_execute)
+    return slow_query_log
+
+def disable_slow_query_log(bind=engine):
+    global slow_query_log
+    if slow_query_log is not None:
+        event.remove(bind, "before_cursor_execute", slow_query_log.before_cursor_execute)
+        event.remove(bind, "after_cursor_execute", slow_query_log.after_cursor_execute)
+        slow_query_log = None
+
+if SLOW_QUERY_LOG:
+    enable_slow_query_log(SLOW_QUERY_LOG)
@@ -0,0 +1,116 @@
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from . import fx, models, schemas
+from .responses import dumps
+
+logger = logging.getLogger(__name__)
+
+# Dialects with INSERT ... ON CONFLICT, so concurrent first reads don't collide on the key
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def render(db: Session, product: models.Product) -> Dict[schemas.UnitSystem, bytes]:
+    # Best offer is the cheapest by normalized price, read off the (product_id, price_usd) index
+    fx.ensure_rates(db)
+    best_offer = (
+        db.query(models.Offer)
+        .filter(models.Offer.product_id == product.id, models.Offer.price_usd.isnot(None))
+        .order_by(models.Offer.price_usd)
+        .first()
+    )
+    suppliers = (
+        db.query(models.Supplier, func.count(models.Offer.id).label("offer_count"))
+        .join(models.Offer, models.Offer.supplier_id == models.Supplier.id)
+        .filter(models.Offer.product_id == product.id)
+        .group_by(models.Supplier.id)
+        .order_by(models.Supplier.id)
+        .all()
+    )
+
+    extra = {
+        "best_offer": schemas.Offer.model_validate(best_offer).model_dump(mode="json") if best_offer else None,
+        "suppliers": [
+            schemas.SupplierSummary(
+                id=supplier.id,
+                name=supplier.name,
+                tier=supplier.tier,
+                tags=supplier.tags or [],
+                offer_count=offer_count
+            ).model_dump(mode="json")
+            for supplier, offer_count in suppliers
+        ],
+    }
+    return {
+        unit_system: dumps({**schemas.Product.dump_with_units(product, unit_system), **extra})
+        for unit_system in schemas.UnitSystem
+    }
+
+
+def store(db: Session, product_id: int, bodies: Dict[schemas.UnitSystem, bytes], replace: bool = True):
+    # Writes replace the stored document. Reads only fill in a missing one: a
+    # read may have rendered before an offer committed, and must not overwrite
+    # the newer document the write stored meanwhile
+    values = {
+        "product_id": product_id,
+        "metric": bodies[schemas.UnitSystem.metric],
+        "imperial": bodies[schemas.UnitSystem.imperial],
+    }
+    upsert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if upsert is None:
+        if replace:
+            db.merge(models.ProductDocument(**values))
+        else:
+            db.add(models.ProductDocument(**values))
+    else:
+        statement = upsert(models.ProductDocument).values(**values)
+        if replace:
+            statement = statement.on_conflict_do_update(
+                index_elements=["product_id"],
+                set_={"metric": statement.excluded.metric, "imperial": statement.excluded.imperial,
+                      "updated_at": func.now()}
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=["product_id"])
+        db.execute(statement)
+    db.commit()
+
+
+def refresh(db: Session, product: models.Product, replace: bool = True) -> Dict[schemas.UnitSystem, bytes]:
+    bodies = render(db, product)
+    try:
+        store(db, product.id, bodies, replace)
+    except SQLAlchemyError:
+        # The rendered body is still good to serve; the next read stores it
+        db.rollback()
+        logger.warning("Could not store the document for product %s", product.id, exc_info=True)
+    return bodies
+
+
+def product_changed(db: Session, product: models.Product):
+    # Called by the routers after the product or one of its offers is committed.
+    # The write already succeeded, so a failure here must not fail the request:
+    # drop the stale document instead and let the next read render it
+    try:
+        refresh(db, product)
+    except Exception:
+        db.rollback()
+        logger.exception("Could not render the document for product %s", product.id)
+        try:
+            db.execute(delete(models.ProductDocument).where(models.ProductDocument.product_id == product.id))
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            logger.exception("Could not drop the stale document for product %s", product.id)
+
+
+def get(db: Session, product_id: int, unit_system: schemas.UnitSystem) -> Optional[bytes]:
+    column = getattr(models.ProductDocument, unit_system.value)
+    return db.execute(
+        select(column).where(models.ProductDocument.product_id == product_id)
+    ).scalar()
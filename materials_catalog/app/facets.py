@@ -0,0 +1,214 @@
+import os
+from collections import Counter, defaultdict
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models
+from .indexing import RebuildableIndex
+
+load_dotenv()
+
+# Full rebuild interval; picks up writes made by other workers or by import_catalog.py
+FACETS_REFRESH_SECONDS = int(os.getenv("FACETS_REFRESH_SECONDS", "300"))
+
+# Upper bounds of the numeric buckets shown for each attribute
+NUMERIC_BUCKETS = {
+    "thickness_mm": [10, 25, 50, 100],
+    "coverage_sqm": [1, 5, 10],
+}
+# Text attributes offered as facets; free-form ones like SKUs or model numbers
+# would get one posting set per product
+TEXT_FACETS = {
+    name.strip()
+    for name in os.getenv("FACET_TEXT_ATTRIBUTES", "material,color,fire_rating").split(",")
+    if name.strip()
+}
+MAX_TEXT_VALUE_LENGTH = 40
+# Most frequent values returned per attribute
+FACET_MAX_VALUES = int(os.getenv("FACET_MAX_VALUES", "50"))
+
+
+def _bucket(name, value) -> Optional[str]:
+    if isinstance(value, bool):
+        return None
+    if name in NUMERIC_BUCKETS and isinstance(value, (int, float)):
+        lower = 0
+        for upper in NUMERIC_BUCKETS[name]:
+            if value < upper:
+                return f"{lower}-{upper}"
+            lower = upper
+        return f"{lower}+"
+    if name in TEXT_FACETS and isinstance(value, str) and value and len(value) <= MAX_TEXT_VALUE_LENGTH:
+        return value
+    return None
+
+
+class FacetIndex(RebuildableIndex):
+    refresh_seconds = FACETS_REFRESH_SECONDS
+
+    def __init__(self):
+        super().__init__()
+        self._reset()
+
+    def _reset(self):
+        self.products = set()
+        # (facet, value) -> product ids; len() of each set is the unfiltered count
+        self.postings: Dict[tuple, set] = defaultdict(set)
+        self.product_keys: Dict[int, list] = {}
+        # Offers can repeat per product/supplier, so supplier-derived facets are ref counted
+        self.supplier_refs: Dict[tuple, Counter] = defaultdict(Counter)
+        self.suppliers: Dict[int, tuple] = {}
+        self.supplier_products: Dict[int, Counter] = defaultdict(Counter)
+
+    @staticmethod
+    def _supplier_keys(tier, tags):
+        return [("tier", tier)] + [("tag", tag) for tag in set(tags or [])]
+
+    def _add_product(self, product_id, category, attributes):
+        keys = [("category", category)]
+        for name, value in (attributes or {}).items():
+            bucket = _bucket(name, value)
+            if bucket is not None:
+                keys.append(("attribute", name, bucket))
+        self._remove_product(product_id)
+        self.products.add(product_id)
+        self.product_keys[product_id] = keys
+        for key in keys:
+            self.postings[key].add(product_id)
+
+    def _remove_product(self, product_id):
+        for key in self.product_keys.pop(product_id, []):
+            self.postings[key].discard(product_id)
+            if not self.postings[key]:
+                del self.postings[key]
+        self.products.discard(product_id)
+
+    def _add_supplier(self, supplier_id, tier, tags):
+        old = self.suppliers.get(supplier_id)
+        products = self.supplier_products.get(supplier_id, Counter())
+        if old is not None:
+            for key in self._supplier_keys(*old):
+                for product_id, count in products.items():
+                    self._change_ref(key, product_id, -count)
+        self.suppliers[supplier_id] = (tier, list(tags or []))
+        for key in self._supplier_keys(tier, tags):
+            for product_id, count in products.items():
+                self._change_ref(key, product_id, count)
+
+    def _add_offer(self, product_id, supplier_id, delta=1):
+        self.supplier_products[supplier_id][product_id] += delta
+        if self.supplier_products[supplier_id][product_id] <= 0:
+            del self.supplier_products[supplier_id][product_id]
+        supplier = self.suppliers.get(supplier_id)
+        if supplier is not None:
+            for key in self._supplier_keys(*supplier):
+                self._change_ref(key, product_id, delta)
+
+    def _change_ref(self, key, product_id, delta):
+        refs = self.supplier_refs[key]
+        refs[product_id] += delta
+        if refs[product_id] > 0:
+            self.postings[key].add(product_id)
+        else:
+            del refs[product_id]
+            self.postings[key].discard(product_id)
+            if not self.postings[key]:
+                del self.postings[key]
+
+    def _apply(self, kind, key, *args):
+        self._remember(kind, key, args)
+        getattr(self, f"_add_{kind}")(*args)
+
+    # Write hooks, called by the routers after a successful commit
+    def product_changed(self, product: models.Product):
+        with self._lock:
+            self._apply("product", product.id, product.id, product.category, product.attributes)
+
+    def supplier_changed(self, supplier: models.Supplier):
+        with self._lock:
+            self._apply("supplier", supplier.id, supplier.id, supplier.tier, supplier.tags)
+
+    def offer_added(self, offer: models.Offer):
+        with self._lock:
+            self._apply("offer", offer.id, offer.product_id, offer.supplier_id)
+
+    def _load(self, db: Session):
+        products = db.execute(
+            select(models.Product.id, models.Product.category, models.Product.attributes)
+        ).all()
+        suppliers = db.execute(
+            select(models.Supplier.id, models.Supplier.tier, models.Supplier.tags)
+        ).all()
+        offers = db.execute(select(models.Offer.id, models.Offer.product_id, models.Offer.supplier_id)).all()
+        return products, suppliers, offers
+
+    def _install(self, loaded, pending):
+        products, suppliers, offers = loaded
+        self._reset()
+        for row in products:
+            self._add_product(row.id, row.category, row.attributes)
+        for row in suppliers:
+            self._add_supplier(row.id, row.tier, row.tags)
+        for row in offers:
+            self._add_offer(row.product_id, row.supplier_id)
+
+        # Product and supplier updates are idempotent; offers are counted, so
+        # skip the ones the rebuild already read
+        pending_offers = {key for kind, key, _ in pending if kind == "offer"}
+        read_offers = {row.id for row in offers if row.id in pending_offers}
+        for kind, key, args in pending:
+            if kind == "offer" and key in read_offers:
+                continue
+            getattr(self, f"_add_{kind}")(*args)
+
+    def _matching(self, category, supplier_tier, supplier_tag) -> Optional[set]:
+        # Same semantics as GET /api/products: tier and tag must match the same supplier
+        matching = None
+        if category:
+            matching = set(self.postings.get(("category", category), ()))
+        if supplier_tier and supplier_tag:
+            by_supplier = set()
+            for supplier_id, (tier, tags) in self.suppliers.items():
+                if tier == supplier_tier and supplier_tag in tags:
+                    by_supplier.update(self.supplier_products.get(supplier_id, ()))
+        elif supplier_tier:
+            by_supplier = self.postings.get(("tier", supplier_tier), set())
+        elif supplier_tag:
+            by_supplier = self.postings.get(("tag", supplier_tag), set())
+        else:
+            return matching
+        return by_supplier if matching is None else matching & by_supplier
+
+    def counts(
+        self,
+        category: Optional[str] = None,
+        supplier_tier: Optional[str] = None,
+        supplier_tag: Optional[str] = None
+    ) -> dict:
+        with self._lock:
+            matching = self._matching(category, supplier_tier, supplier_tag)
+            result = {"total": len(self.products if matching is None else matching),
+                      "categories": {}, "tiers": {}, "tags": {}, "attributes": {}}
+            groups = {"category": "categories", "tier": "tiers", "tag": "tags"}
+
+            for key, product_ids in self.postings.items():
+                # Set intersection runs in C over the smaller of the two sets
+                count = len(product_ids) if matching is None else len(matching & product_ids)
+                if not count:
+                    continue
+                if key[0] == "attribute":
+                    result["attributes"].setdefault(key[1], {})[key[2]] = count
+                else:
+                    result[groups[key[0]]][key[1]] = count
+
+        for name, values in result["attributes"].items():
+            if len(values) > FACET_MAX_VALUES:
+                top = sorted(values.items(), key=lambda item: (-item[1], item[0]))[:FACET_MAX_VALUES]
+                result["attributes"][name] = dict(top)
+        return result
+
+
+index = FacetIndex()
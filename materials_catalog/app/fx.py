@@ -0,0 +1,139 @@
+import json
+import logging
+import math
+import os
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Default sits next to the app package, so it does not depend on the working directory
+FX_RATES_FILE = os.getenv(
+    "FX_RATES_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fx_rates.json")
+)
+BASE_CURRENCY = "USD"
+
+
+class UnknownCurrency(ValueError):
+    pass
+
+
+class RatesUnavailable(Exception):
+    pass
+
+
+def current_version(db: Session) -> Optional[str]:
+    # Latest loaded snapshot wins
+    return db.execute(
+        select(models.FxRate.version).order_by(models.FxRate.id.desc()).limit(1)
+    ).scalar()
+
+
+# Snapshots never change once stored, so their rates are memoized by version
+_rates_by_version: Dict[str, Dict[str, float]] = {}
+
+
+def rates_for(db: Session, version: str) -> Dict[str, float]:
+    rates = _rates_by_version.get(version)
+    if rates is None:
+        rows = db.execute(
+            select(models.FxRate.currency, models.FxRate.usd_per_unit).where(models.FxRate.version == version)
+        ).all()
+        rates = _rates_by_version[version] = {row.currency: row.usd_per_unit for row in rows}
+    return rates
+
+
+def convert(db: Session, amount: float, from_currency: str, to_currency: str,
+            version: Optional[str] = None) -> float:
+    if from_currency.upper() == to_currency.upper():
+        return amount
+    version = version or ensure_rates(db)
+    if version is None:
+        raise RatesUnavailable("No FX rates are loaded")
+    rates = rates_for(db, version)
+    for currency in (from_currency.upper(), to_currency.upper()):
+        if currency not in rates:
+            raise UnknownCurrency(f"No FX rate for {currency} in snapshot {version}")
+    return amount * rates[from_currency.upper()] / rates[to_currency.upper()]
+
+
+def load_rates_file(db: Session, path: Optional[str] = None) -> str:
+    with open(path or FX_RATES_FILE) as f:
+        data = json.load(f)
+    version = str(data["version"])
+    rates = {currency.upper(): float(rate) for currency, rate in data["usd_per_unit"].items()}
+    rates.setdefault(BASE_CURRENCY, 1.0)
+    for currency, rate in rates.items():
+        # Rates are divided by when converting, so zero would fail every request for that currency
+        if not math.isfinite(rate) or rate <= 0:
+            raise ValueError(f"FX rate for {currency} must be a positive number, got {rate}")
+
+    exists = db.execute(
+        select(models.FxRate.id).where(models.FxRate.version == version).limit(1)
+    ).first()
+    if exists and version != current_version(db):
+        # The latest stored snapshot is the current one, so reloading an older
+        # version would not take effect
+        raise ValueError(f"FX rates version {version} is already stored; give the rates file a new version")
+    if not exists:
+        try:
+            db.execute(
+                insert(models.FxRate),
+                [{"version": version, "currency": currency, "usd_per_unit": rate} for currency, rate in rates.items()]
+            )
+            recompute_normalized_prices(db, version)
+            # Cached product documents embed the best offer, which may have changed
+            db.execute(delete(models.ProductDocument))
+            db.commit()
+        except IntegrityError:
+            # Another worker stored the same version between the check and the insert
+            db.rollback()
+            if current_version(db) != version:
+                raise
+    return version
+
+
+def ensure_rates(db: Session) -> Optional[str]:
+    # Load the rates file the first time FX is needed on an empty database
+    version = current_version(db)
+    if version is not None:
+        return version
+    try:
+        return load_rates_file(db)
+    except (OSError, ValueError, KeyError) as e:
+        # Offers are still stored, just without a normalized price until rates are loaded
+        logger.warning("No FX rates available from %s: %s", FX_RATES_FILE, e)
+        return None
+
+
+def recompute_normalized_prices(db: Session, version: str):
+    # One UPDATE for every offer: price * rate picked by currency, NULL when unknown
+    rates = rates_for(db, version)
+    table = models.Offer.__table__
+    db.execute(
+        update(table).values(
+            price_usd=table.c.price * case(rates, value=func.upper(table.c.currency), else_=None),
+            fx_version=version
+        )
+    )
+
+
+def normalize_offer(db: Session, offer: models.Offer):
+    version = ensure_rates(db)
+    if version is None:
+        offer.price_usd = None
+        offer.fx_version = None
+        return
+    try:
+        offer.price_usd = convert(db, offer.price, offer.currency or BASE_CURRENCY, BASE_CURRENCY, version)
+    except UnknownCurrency:
+        offer.price_usd = None
+    offer.fx_version = version
@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+from typing import Any, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class RebuildableIndex:
+    # In-memory index kept current by write hooks and rebuilt from the database
+    # every refresh_seconds. Subclasses implement _load (read the tables, outside
+    # the lock) and _install (swap the result in, under the lock); write hooks
+    # call _remember under the lock so a rebuild in progress can replay them
+    refresh_seconds = 300
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held by the one thread doing a full rebuild
+        self._rebuild_lock = threading.Lock()
+        # Hook calls made while a rebuild is reading the tables
+        self._pending: Optional[List[tuple]] = None
+        self.built_at = 0.0
+
+    def _remember(self, *entry):
+        if self._pending is not None:
+            self._pending.append(entry)
+
+    def _load(self, db: Session) -> Any:
+        raise NotImplementedError
+
+    def _install(self, loaded: Any, pending: List[tuple]):
+        # Writes committed after the tables were read would otherwise be
+        # missing until the next rebuild, so pending hook calls are replayed
+        raise NotImplementedError
+
+    def _rebuild(self, db: Session):
+        with self._lock:
+            self._pending = []
+        try:
+            loaded = self._load(db)
+            with self._lock:
+                self._install(loaded, self._pending)
+                self.built_at = time.time()
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def rebuild(self, db: Session):
+        with self._rebuild_lock:
+            self._rebuild(db)
+
+    def _rebuild_in_background(self):
+        db = SessionLocal()
+        try:
+            self._rebuild(db)
+        except Exception:
+            logger.exception("Background rebuild of %s failed", type(self).__name__)
+        finally:
+            db.close()
+            self._rebuild_lock.release()
+
+    def start_background_rebuild(self) -> bool:
+        # No-op when a rebuild is already running
+        if not self._rebuild_lock.acquire(blocking=False):
+            return False
+        threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+        return True
+
+    def ensure_fresh(self, db: Session, max_age_seconds: Optional[int] = None):
+        max_age_seconds = self.refresh_seconds if max_age_seconds is None else max_age_seconds
+        if time.time() - self.built_at < max_age_seconds:
+            return
+        if self.built_at:
+            # Stale: keep serving the current index while one thread rebuilds it
+            self.start_background_rebuild()
+            return
+        # Nothing to serve yet, so wait for the first build (or one already running)
+        with self._rebuild_lock:
+            if not self.built_at:
+                self._rebuild(db)
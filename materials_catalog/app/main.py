@@ -1,10 +1,27 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base
-from . import models
-from .routers import auth, products, suppliers, offers, analytics
+from .database import engine, Base, RequestScopeMiddleware
+from . import models, facets, related
+from .ratelimit import RateLimitMiddleware
+from .routers import auth, products, suppliers, offers, analytics, fx, admin
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the in-memory indexes in the background at startup, so the first
+    # facet or related-products request doesn't pay for a full scan
+    facets.index.start_background_rebuild()
+    related.index.start_background_rebuild()
+    yield
+
+app = FastAPI(title="Materials Catalog API", lifespan=lifespan)
+
+# Tags slow query log entries with the route that issued them
+app.add_middleware(RequestScopeMiddleware)
 
-app = FastAPI(title="Materials Catalog API")
+# Rate limiting and load shedding (added first so CORS headers still wrap 429/503 responses)
+app.add_middleware(RateLimitMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -24,6 +41,8 @@ app.include_router(products.router, prefix="/api", tags=["products"])
 app.include_router(suppliers.router, prefix="/api", tags=["suppliers"])
 app.include_router(offers.router, prefix="/api", tags=["offers"])
 app.include_router(analytics.router, prefix="/api", tags=["analytics"])
+app.include_router(fx.router, prefix="/api", tags=["fx"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
 
 @app.get("/")
 async def root():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Table, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Table, Text, Index, UniqueConstraint, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -54,11 +54,18 @@ class Offer(Base):
     supplier_id = Column(Integer, ForeignKey("suppliers.id"), nullable=False)
     price = Column(Float, nullable=False)
     currency = Column(String(3), default="USD")
+    # Price converted to USD with the FX snapshot in fx_version; NULL when the currency has no rate
+    price_usd = Column(Float, nullable=True)
+    fx_version = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     product = relationship("Product", back_populates="offers")
     supplier = relationship("Supplier", back_populates="offers")
+    
+    __table_args__ = (
+        Index("ix_offers_product_price_usd", "product_id", "price_usd"),
+    )
 
 class Event(Base):
     __tablename__ = "events"
@@ -70,4 +77,37 @@ class Event(Base):
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    product = relationship("Product", back_populates="events")
\ No newline at end of file
+    product = relationship("Product", back_populates="events")
+
+class ImportCheckpoint(Base):
+    __tablename__ = "import_checkpoints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, unique=True, nullable=False)
+    fingerprint = Column(String, nullable=True)  # size and hash of the file's first and last MB
+    position = Column(Integer, nullable=False, default=0)  # records consumed from the source file
+    rows_imported = Column(Integer, nullable=False, default=0)
+    rows_rejected = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class FxRate(Base):
+    __tablename__ = "fx_rates"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    version = Column(String, nullable=False, index=True)
+    currency = Column(String(3), nullable=False)
+    usd_per_unit = Column(Float, nullable=False)
+    loaded_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint("version", "currency"),
+    )
+
+class ProductDocument(Base):
+    __tablename__ = "product_documents"
+    
+    # Pre-rendered GET /api/products/{id} bodies, one per unit system
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    metric = Column(LargeBinary, nullable=False)
+    imperial = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
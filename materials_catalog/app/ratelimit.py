@@ -0,0 +1,186 @@
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from jose import JWTError, jwt
+from starlette.responses import JSONResponse
+
+from .auth import SECRET_KEY, ALGORITHM
+
+load_dotenv()
+
+
+def _budget(name: str, default: str) -> Tuple[float, float]:
+    # "<tokens per second>/<burst>", e.g. "20/60"
+    rate, burst = os.getenv(name, default).split("/")
+    return float(rate), float(burst)
+
+
+# Off by default: callers are keyed on the connecting address, which behind a
+# proxy is the proxy itself unless uvicorn runs with --proxy-headers
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "false").lower() in ("1", "true", "yes")
+# Shedding does not tell callers apart, so it is safe behind a proxy and on by default
+LOAD_SHEDDING_ENABLED = os.getenv("LOAD_SHEDDING_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMITS = {
+    "read": _budget("RATE_LIMIT_READ", "50/100"),
+    "write": _budget("RATE_LIMIT_WRITE", "10/30"),
+    "events": _budget("RATE_LIMIT_EVENTS", "20/50"),
+}
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", "64"))
+MIN_IN_FLIGHT = int(os.getenv("MIN_IN_FLIGHT", "4"))
+TARGET_LATENCY_MS = float(os.getenv("TARGET_LATENCY_MS", "250"))
+MAX_TRACKED_CLIENTS = 100_000
+
+# Long-lived streams would hold a concurrency slot forever
+SHED_EXEMPT_PATHS = {"/api/insights/trending/stream"}
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def wait(self) -> float:
+        # Returns 0 when a token is available, otherwise seconds until one is
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class LoadShedder:
+    # Adaptive concurrency limit: shrink while requests are slower than the
+    # target latency, grow back slowly while they are faster
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, min_in_flight: int = MIN_IN_FLIGHT,
+                 target_latency_ms: float = TARGET_LATENCY_MS):
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min_in_flight
+        self.target_latency = target_latency_ms / 1000
+        self.limit = float(max_in_flight)
+        self.in_flight = 0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float):
+        self.in_flight -= 1
+        if latency > self.target_latency:
+            self.limit = max(self.min_in_flight, self.limit * 0.9)
+        else:
+            self.limit = min(self.max_in_flight, self.limit + 1 / self.limit)
+
+
+def route_class(method: str, path: str) -> str:
+    if path == "/api/events":
+        return "events"
+    if method in ("GET", "HEAD"):
+        return "read"
+    return "write"
+
+
+def client_identities(scope) -> List[str]:
+    # The address bucket is always charged, so nothing a caller sends can raise
+    # its allowance; a valid login token adds a per-user bucket on top of it
+    client = scope.get("client")
+    identities = [f"ip:{client[0] if client else 'unknown'}"]
+    headers = dict(scope.get("headers") or [])
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    if authorization.lower().startswith("bearer "):
+        try:
+            payload = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM])
+            if payload.get("sub"):
+                identities.append(f"user:{payload['sub']}")
+        except JWTError:
+            pass
+    return identities
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 shedder: Optional[LoadShedder] = None, enabled: bool = RATE_LIMIT_ENABLED,
+                 shedding: bool = LOAD_SHEDDING_ENABLED):
+        self.app = app
+        self.limits = limits or RATE_LIMITS
+        self.shedder = shedder or LoadShedder()
+        self.enabled = enabled
+        self.shedding = shedding
+        # Separate LRUs per identity kind, so minting many user buckets can
+        # not evict (and so reset) the address buckets
+        self.buckets: "Dict[str, OrderedDict[Tuple[str, str], TokenBucket]]" = {
+            "ip": OrderedDict(),
+            "user": OrderedDict(),
+        }
+
+    def _bucket(self, kind: str, identity: str) -> TokenBucket:
+        buckets = self.buckets[identity.split(":", 1)[0]]
+        key = (kind, identity)
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(*self.limits[kind])
+            if len(buckets) > MAX_TRACKED_CLIENTS:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(key)
+        return bucket
+
+    def _take(self, kind: str, scope) -> float:
+        # A request rejected by one bucket is not charged to the others
+        buckets = [self._bucket(kind, identity) for identity in client_identities(scope)]
+        wait = max(bucket.wait() for bucket in buckets)
+        if not wait:
+            for bucket in buckets:
+                bucket.take()
+        return wait
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        method = scope.get("method", "")
+        if scope["type"] != "http" or not path.startswith("/api") or method == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        if self.enabled:
+            kind = route_class(method, path)
+            wait = self._take(kind, scope)
+            if wait:
+                response = JSONResponse(
+                    {"detail": f"Rate limit exceeded for {kind} requests"},
+                    status_code=429,
+                    headers={"Retry-After": str(math.ceil(wait))}
+                )
+                await response(scope, receive, send)
+                return
+
+        if not self.shedding or path in SHED_EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if not self.shedder.try_acquire():
+            response = JSONResponse(
+                {"detail": "Server is overloaded, please retry"},
+                status_code=503,
+                headers={"Retry-After": "1"}
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.shedder.release(time.monotonic() - started)
@@ -0,0 +1,155 @@
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .indexing import RebuildableIndex
+
+load_dotenv()
+
+# Co-viewed products kept per product; counts are pruned back to this after
+# growing to twice the size, so memory is bounded by the number of products
+RELATED_TOP_N = int(os.getenv("RELATED_TOP_N", "20"))
+# Products remembered per session when pairing a new view with earlier ones
+RELATED_SESSION_PRODUCTS = int(os.getenv("RELATED_SESSION_PRODUCTS", "50"))
+RELATED_MAX_SESSIONS = int(os.getenv("RELATED_MAX_SESSIONS", "100000"))
+# Full rebuild interval; picks up views recorded by other workers
+RELATED_REFRESH_SECONDS = int(os.getenv("RELATED_REFRESH_SECONDS", "3600"))
+# Rows added at a time when more products show up than were preallocated
+RELATED_GROWTH_ROWS = 65536
+
+
+class CoViewIndex(RebuildableIndex):
+    refresh_seconds = RELATED_REFRESH_SECONDS
+
+    def __init__(self, top_n: int = RELATED_TOP_N, session_products: int = RELATED_SESSION_PRODUCTS,
+                 max_sessions: int = RELATED_MAX_SESSIONS, expected_products: int = 0):
+        super().__init__()
+        self.top_n = top_n
+        self.capacity = 2 * top_n
+        self.session_products = session_products
+        self.max_sessions = max_sessions
+        self._reset(expected_products)
+
+    def _reset(self, expected_products: int = 0):
+        # product id -> row of the arrays below
+        self.rows: Dict[int, int] = {}
+        # Each row holds up to 2 * top_n co-viewed product ids (-1 when unused)
+        # and the number of sessions in which both were viewed, unsorted: 320
+        # bytes a product at top_n 20. See the README for the full footprint
+        self.ids = np.full((expected_products, self.capacity), -1, dtype=np.int32)
+        self.counts = np.zeros((expected_products, self.capacity), dtype=np.int32)
+        self.lengths = np.zeros(expected_products, dtype=np.int32)
+        self.sessions: "OrderedDict[str, List[int]]" = OrderedDict()
+
+    def _row(self, product_id: int) -> int:
+        row = self.rows.get(product_id)
+        if row is not None:
+            return row
+        row = self.rows[product_id] = len(self.rows)
+        if row == len(self.lengths):
+            # Rebuilds preallocate one row per product, so this only runs for
+            # products added since; fixed steps keep the overshoot small
+            size = row + RELATED_GROWTH_ROWS
+            ids = np.full((size, self.capacity), -1, dtype=np.int32)
+            counts = np.zeros((size, self.capacity), dtype=np.int32)
+            lengths = np.zeros(size, dtype=np.int32)
+            ids[:row], counts[:row], lengths[:row] = self.ids, self.counts, self.lengths
+            self.ids, self.counts, self.lengths = ids, counts, lengths
+        return row
+
+    def _prune(self, row: int):
+        keep = np.argsort(-self.counts[row], kind="stable")[:self.top_n]
+        ids, counts = self.ids[row, keep], self.counts[row, keep]
+        self.ids[row] = -1
+        self.counts[row] = 0
+        self.ids[row, :self.top_n] = ids
+        self.counts[row, :self.top_n] = counts
+        self.lengths[row] = self.top_n
+
+    def _add_pairs(self, rows: np.ndarray, others: np.ndarray):
+        # Adds one to the count of others[i] in rows[i]; the (row, other) pairs are distinct
+        matches = self.ids[rows] == others[:, None]
+        found = matches.any(axis=1)
+        self.counts[rows[found], matches[found].argmax(axis=1)] += 1
+        for row, other in zip(rows[~found].tolist(), others[~found].tolist()):
+            length = self.lengths[row]
+            if length == self.capacity:
+                # A newcomer with a single session never outranks a full row
+                self._prune(row)
+                continue
+            self.ids[row, length] = other
+            self.counts[row, length] = 1
+            self.lengths[row] = length + 1
+
+    def _record(self, session_id: str, product_id: int):
+        viewed = self.sessions.get(session_id)
+        if viewed is None:
+            viewed = self.sessions[session_id] = []
+            if len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        else:
+            self.sessions.move_to_end(session_id)
+        # Repeat views in a session only count once per pair
+        if product_id in viewed:
+            return
+        if viewed:
+            row = self._row(product_id)
+            other_rows = np.array([self._row(other_id) for other_id in viewed])
+            others = np.array(viewed, dtype=np.int32)
+            self._add_pairs(np.full(len(viewed), row), others)
+            self._add_pairs(other_rows, np.full(len(viewed), product_id, dtype=np.int32))
+        viewed.append(product_id)
+        if len(viewed) > self.session_products:
+            del viewed[0]
+
+    def record_view(self, session_id: str, product_id: int, event_id: Optional[int] = None):
+        with self._lock:
+            self._remember(event_id, session_id, product_id)
+            self._record(session_id, product_id)
+
+    def related(self, product_id: int, limit: int) -> List[Tuple[int, int]]:
+        with self._lock:
+            row = self.rows.get(product_id)
+            if row is None:
+                return []
+            length = self.lengths[row]
+            ids, counts = self.ids[row, :length], self.counts[row, :length]
+            order = np.lexsort((ids, -counts))[:min(limit, self.top_n)]
+            return [(int(ids[i]), int(counts[i])) for i in order]
+
+    def _load(self, db: Session):
+        # Views committed from here on may or may not be in the read below
+        last_seen_id = db.execute(select(func.max(models.Event.id))).scalar() or 0
+        events = db.execute(
+            select(models.Event.id, models.Event.session_id, models.Event.product_id)
+            .where(models.Event.event_type == "product_view")
+            .order_by(models.Event.session_id, models.Event.timestamp, models.Event.id)
+            .execution_options(yield_per=10000)
+        )
+        # Build off to the side so lookups and ingest are not blocked meanwhile;
+        # until the swap both copies are in memory
+        products = db.execute(select(func.count(models.Product.id))).scalar() or 0
+        fresh = CoViewIndex(self.top_n, self.session_products, self.max_sessions, expected_products=products)
+        read_late = set()
+        for row in events:
+            fresh._record(row.session_id, row.product_id)
+            if row.id > last_seen_id:
+                read_late.add(row.id)
+        return fresh, last_seen_id, read_late
+
+    def _install(self, loaded, pending):
+        fresh, last_seen_id, read_late = loaded
+        for event_id, session_id, product_id in pending:
+            if event_id is None or (event_id > last_seen_id and event_id not in read_late):
+                fresh._record(session_id, product_id)
+        self.rows, self.ids, self.counts = fresh.rows, fresh.ids, fresh.counts
+        self.lengths, self.sessions = fresh.lengths, fresh.sessions
+
+
+index = CoViewIndex()
@@ -0,0 +1,28 @@
+import os
+from typing import Any
+
+from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the standard json encoder
+    orjson = None
+
+load_dotenv()
+
+# Return trusted rows as pre-built dicts instead of validating them against the response model
+FAST_RESPONSES = os.getenv("FAST_RESPONSES", "true").lower() in ("1", "true", "yes")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is None:
+        return JSONResponse(jsonable_encoder(content)).body
+    # OPT_UTC_Z matches Pydantic's "Z" suffix for UTC datetimes
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
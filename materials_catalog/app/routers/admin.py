@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List
+from .. import schemas, auth, database
+
+router = APIRouter()
+
+@router.get("/admin/slow-queries", response_model=List[schemas.SlowQueryStats], dependencies=[Depends(auth.get_admin_user)])
+def get_slow_queries(limit: int = Query(20, ge=1, le=100)):
+    if database.slow_query_log is None:
+        raise HTTPException(status_code=404, detail="Slow query log is not enabled (set SLOW_QUERY_LOG)")
+    # Aggregated from the JSONL log files, so it covers every request since the log was created
+    return database.slow_query_log.top_offenders(limit)
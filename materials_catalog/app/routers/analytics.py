@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List
-from .. import schemas, models, auth
+from .. import schemas, models, auth, snapshot, trending, related
 from ..database import get_db
 
 router = APIRouter()
@@ -23,6 +23,9 @@ def create_event(event: schemas.EventCreate, db: Session = Depends(get_db)):
     db.add(db_event)
     db.commit()
     db.refresh(db_event)
+    trending.broadcaster.notify()
+    if db_event.event_type == "product_view":
+        related.index.record_view(db_event.session_id, db_event.product_id, db_event.id)
     return {"message": "Event recorded successfully"}
 
 @router.get("/insights/trending", response_model=List[schemas.TrendingProduct])
@@ -31,31 +34,36 @@ def get_trending_products(
     window_hours: int = Query(24, ge=1),
     limit: int = Query(5, ge=1, le=100)
 ):
-    # Calculate time window
-    time_threshold = datetime.utcnow() - timedelta(hours=window_hours)
-    
-    # Query trending products
-    trending = (
-        db.query(
-            models.Event.product_id,
-            models.Product.name,
-            models.Product.category,
-            func.count(models.Event.id).label('view_count')
-        )
-        .join(models.Product, models.Event.product_id == models.Product.id)
-        .filter(models.Event.timestamp >= time_threshold)
-        .group_by(models.Event.product_id, models.Product.name, models.Product.category)
-        .order_by(desc('view_count'))
-        .limit(limit)
-        .all()
+    return trending.trending_products(db, window_hours, limit)
+
+@router.get("/insights/trending/stream")
+async def stream_trending_products(
+    window_hours: int = Query(24, ge=1, le=trending.TRENDING_MAX_WINDOW_HOURS),
+    limit: int = Query(5, ge=1, le=trending.TRENDING_MAX_LIMIT)
+):
+    # Server-sent events: a full "snapshot" first, then a "diff" whenever the ranking changes
+    return StreamingResponse(
+        trending.broadcaster.stream(window_hours, limit),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/insights/price-by-category", response_model=List[schemas.CategoryPriceStats])
+def get_price_by_category(db: Session = Depends(get_db)):
+    # Served from the columnar snapshot, not the OLTP tables
+    return snapshot.get_snapshot(db).price_by_category()
+
+@router.get("/insights/coverage-per-dollar", response_model=List[schemas.TierCoverageStats])
+def get_coverage_per_dollar(db: Session = Depends(get_db)):
+    return snapshot.get_snapshot(db).coverage_per_dollar_by_tier()
+
+@router.post("/insights/snapshot", response_model=schemas.SnapshotInfo, dependencies=[Depends(auth.get_admin_user)])
+def refresh_snapshot(db: Session = Depends(get_db)):
+    current = snapshot.refresh_snapshot(db)
+    return schemas.SnapshotInfo(
+        built_at=datetime.utcfromtimestamp(current.built_at),
+        product_count=len(current.products["id"]),
+        offer_count=len(current.offers["price"]),
+        categories=current.categories,
+        attributes=current.attribute_names
     )
-    
-    return [
-        schemas.TrendingProduct(
-            product_id=row.product_id,
-            product_name=row.name,
-            category=row.category,
-            view_count=row.view_count
-        )
-        for row in trending
-    ]
\ No newline at end of file
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from .. import schemas, auth, fx
+from ..database import get_db
+
+router = APIRouter()
+
+@router.get("/fx/rates", response_model=schemas.FxRates)
+def get_fx_rates(db: Session = Depends(get_db)):
+    version = fx.ensure_rates(db)
+    if version is None:
+        raise HTTPException(status_code=503, detail="FX rates are not available")
+    return schemas.FxRates(version=version, base=fx.BASE_CURRENCY, usd_per_unit=fx.rates_for(db, version))
+
+@router.post("/fx/reload", response_model=schemas.FxRates, dependencies=[Depends(auth.get_admin_user)])
+def reload_fx_rates(db: Session = Depends(get_db)):
+    # A new version in the rates file is stored as a new snapshot and every
+    # offer's normalized price is recomputed in one statement
+    try:
+        version = fx.load_rates_file(db)
+    except (OSError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not load FX rates: {e}")
+    return schemas.FxRates(version=version, base=fx.BASE_CURRENCY, usd_per_unit=fx.rates_for(db, version))
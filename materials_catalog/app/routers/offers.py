@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from .. import schemas, models, auth
+from typing import List
+from .. import schemas, models, auth, facets, fx, documents
 from ..database import get_db
 
 router = APIRouter()
@@ -23,7 +24,52 @@ def create_offer(offer: schemas.OfferCreate, db: Session = Depends(get_db)):
         price=offer.price,
         currency=offer.currency
     )
+    fx.normalize_offer(db, db_offer)
     db.add(db_offer)
     db.commit()
     db.refresh(db_offer)
-    return db_offer
\ No newline at end of file
+    facets.index.offer_added(db_offer)
+    documents.product_changed(db, product)
+    return db_offer
+
+@router.get("/products/{product_id}/offers", response_model=List[schemas.ConvertedOffer])
+def get_product_offers(
+    product_id: int,
+    db: Session = Depends(get_db),
+    currency: str = fx.BASE_CURRENCY,
+    limit: int = Query(20, ge=1, le=100)
+):
+    product = db.query(models.Product).filter(models.Product.id == product_id).first()
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    
+    try:
+        usd_to_target = fx.convert(db, 1.0, fx.BASE_CURRENCY, currency)
+    except fx.UnknownCurrency as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except fx.RatesUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    # Cheapest first, straight off the (product_id, price_usd) index; offers in
+    # currencies without a rate can't be compared and are left out
+    offers = (
+        db.query(models.Offer)
+        .filter(models.Offer.product_id == product_id, models.Offer.price_usd.isnot(None))
+        .order_by(models.Offer.price_usd)
+        .limit(limit)
+        .all()
+    )
+    return [
+        schemas.ConvertedOffer(
+            id=o.id,
+            product_id=o.product_id,
+            supplier_id=o.supplier_id,
+            price=o.price,
+            currency=o.currency,
+            created_at=o.created_at,
+            price_usd=o.price_usd,
+            converted_price=round(o.price_usd * usd_to_target, 2),
+            converted_currency=currency.upper()
+        )
+        for o in offers
+    ]
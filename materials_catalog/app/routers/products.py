@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session, joinedload
 from typing import Optional, List
-from .. import schemas, models, auth
+from .. import schemas, models, auth, facets, responses, related, documents
 from ..database import get_db
 
 router = APIRouter()
@@ -33,14 +33,62 @@ def get_products(
     
     # Execute query and convert to response format
     products = query.offset(skip).limit(limit).all()
+    if responses.FAST_RESPONSES:
+        # Rows come straight from our own table, so skip re-validating them
+        return responses.FastJSONResponse([schemas.Product.dump_with_units(p, unit_system) for p in products])
     return [schemas.Product.from_orm_with_units(p, unit_system) for p in products]
 
-@router.get("/products/{product_id}", response_model=schemas.Product)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
-    if not product:
+@router.get("/products/facets", response_model=schemas.ProductFacets)
+def get_product_facets(
+    db: Session = Depends(get_db),
+    category: Optional[str] = None,
+    supplier_tier: Optional[str] = None,
+    supplier_tag: Optional[str] = None
+):
+    # Counts come from the in-memory facet index, not one COUNT query per facet
+    facets.index.ensure_fresh(db)
+    return facets.index.counts(category, supplier_tier, supplier_tag)
+
+@router.get("/products/{product_id}", response_model=schemas.ProductDetail)
+def get_product(
+    product_id: int,
+    db: Session = Depends(get_db),
+    unit_system: schemas.UnitSystem = schemas.UnitSystem.metric
+):
+    # Single key lookup of the pre-rendered document; render it on first read
+    body = documents.get(db, product_id, unit_system)
+    if body is None:
+        product = db.query(models.Product).filter(models.Product.id == product_id).first()
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        body = documents.refresh(db, product, replace=False)[unit_system]
+    return Response(content=body, media_type="application/json")
+
+@router.get("/products/{product_id}/related", response_model=List[schemas.RelatedProduct])
+def get_related_products(
+    product_id: int,
+    db: Session = Depends(get_db),
+    limit: int = Query(10, ge=1, le=100)
+):
+    # Products most often viewed in the same session, from the co-view index
+    related.index.ensure_fresh(db)
+    top = related.index.related(product_id, limit)
+    
+    ids = [product_id] + [other_id for other_id, _ in top]
+    products = {p.id: p for p in db.query(models.Product).filter(models.Product.id.in_(ids)).all()}
+    if product_id not in products:
         raise HTTPException(status_code=404, detail="Product not found")
-    return schemas.Product.from_orm_with_units(product)
+    
+    return [
+        schemas.RelatedProduct(
+            product_id=other_id,
+            product_name=products[other_id].name,
+            category=products[other_id].category,
+            co_view_count=count
+        )
+        for other_id, count in top
+        if other_id in products
+    ]
 
 @router.post("/products", response_model=schemas.Product, dependencies=[Depends(auth.get_current_user)])
 def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)):
@@ -52,4 +100,6 @@ def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    facets.index.product_changed(db_product)
+    documents.product_changed(db, db_product)
     return schemas.Product.from_orm_with_units(db_product)
\ No newline at end of file
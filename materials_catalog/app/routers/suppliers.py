@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from .. import schemas, models, auth
+from .. import schemas, models, auth, facets
 from ..database import get_db
 
 router = APIRouter()
@@ -15,4 +15,5 @@ def create_supplier(supplier: schemas.SupplierCreate, db: Session = Depends(get_
     db.add(db_supplier)
     db.commit()
     db.refresh(db_supplier)
+    facets.index.supplier_changed(db_supplier)
     return db_supplier
\ No newline at end of file
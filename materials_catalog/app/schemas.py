@@ -59,12 +59,18 @@ class Product(ProductBase):
     
     @classmethod
     def from_orm_with_units(cls, obj, unit_system: UnitSystem = UnitSystem.metric):
+        return cls(**cls.dump_with_units(obj, unit_system))
+    
+    @classmethod
+    def dump_with_units(cls, obj, unit_system: UnitSystem = UnitSystem.metric) -> Dict[str, Any]:
+        # Builds the response dict directly (same keys, order and types as the
+        # validated model) so trusted rows can skip Pydantic validation
         data = {
-            "id": obj.id,
             "name": obj.name,
             "category": obj.category,
-            "created_at": obj.created_at,
-            "attributes": obj.attributes
+            "attributes": obj.attributes,
+            "id": obj.id,
+            "created_at": obj.created_at
         }
         
         # Extract numeric fields
@@ -72,8 +78,8 @@ class Product(ProductBase):
         coverage_sqm = obj.attributes.get('coverage_sqm', 0)
         
         # Add both metric and imperial values
-        data['thickness_mm'] = thickness_mm
-        data['coverage_sqm'] = coverage_sqm
+        data['thickness_mm'] = float(thickness_mm)
+        data['coverage_sqm'] = float(coverage_sqm)
         
         if unit_system == UnitSystem.imperial:
             data['thickness_in'] = thickness_mm / 25.4
@@ -82,7 +88,14 @@ class Product(ProductBase):
             data['thickness_in'] = thickness_mm / 25.4
             data['coverage_sqft'] = coverage_sqm * 10.7639
         
-        return cls(**data)
+        return data
+
+class ProductFacets(BaseModel):
+    total: int
+    categories: Dict[str, int]
+    tiers: Dict[str, int]
+    tags: Dict[str, int]
+    attributes: Dict[str, Dict[str, int]]
 
 # Supplier schemas
 class SupplierBase(BaseModel):
@@ -112,10 +125,31 @@ class OfferCreate(OfferBase):
 class Offer(OfferBase):
     id: int
     created_at: datetime
+    price_usd: Optional[float] = None
     
     class Config:
         from_attributes = True
 
+class SupplierSummary(BaseModel):
+    id: int
+    name: str
+    tier: str
+    tags: List[str] = []
+    offer_count: int
+
+class ProductDetail(Product):
+    best_offer: Optional[Offer] = None
+    suppliers: List[SupplierSummary] = []
+
+class ConvertedOffer(Offer):
+    converted_price: float
+    converted_currency: str
+
+class FxRates(BaseModel):
+    version: str
+    base: str
+    usd_per_unit: Dict[str, float]
+
 # Event schemas
 class EventBase(BaseModel):
     event_type: str = "product_view"
@@ -140,4 +174,39 @@ class TrendingProduct(BaseModel):
     category: str
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class RelatedProduct(BaseModel):
+    product_id: int
+    product_name: str
+    category: str
+    co_view_count: int
+
+class CategoryPriceStats(BaseModel):
+    category: str
+    offer_count: int
+    avg_price: float
+    min_price: float
+    max_price: float
+
+class TierCoverageStats(BaseModel):
+    tier: str
+    offer_count: int
+    avg_coverage_per_dollar: float
+
+class SnapshotInfo(BaseModel):
+    built_at: datetime
+    product_count: int
+    offer_count: int
+    categories: List[str]
+    attributes: List[str]
+
+class SlowQueryStats(BaseModel):
+    statement: str
+    calls: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+    routes: List[str]
+    param_shapes: List[Any]
+    plan: Optional[List[str]] = None
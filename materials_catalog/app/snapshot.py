@@ -0,0 +1,261 @@
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import fx, models
+
+load_dotenv()
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "./snapshots")
+SNAPSHOT_TTL_SECONDS = int(os.getenv("SNAPSHOT_TTL_SECONDS", "300"))
+# Extra numeric attributes copied into the snapshot next to thickness/coverage
+SNAPSHOT_ATTRIBUTES = [
+    name.strip()
+    for name in os.getenv("SNAPSHOT_ATTRIBUTES", "r_value,weight_kg").split(",")
+    if name.strip()
+]
+
+TIERS = ["tier_1", "tier_2"]
+
+PRODUCT_COLUMNS = ["id", "category", "thickness_mm", "coverage_sqm"]
+# Offer prices are the USD-normalized price_usd, NaN when the currency has no FX rate
+OFFER_COLUMNS = ["product_id", "supplier_id", "tier", "price"]
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class CatalogSnapshot:
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.built_at: float = meta["built_at"]
+        self.categories: List[str] = meta["categories"]
+        self.tiers: List[str] = meta["tiers"]
+        self.attribute_names: List[str] = meta["attributes"]
+
+        # Columns are memory-mapped, so loading a snapshot is cheap
+        self.products = {name: self._load("products", name) for name in PRODUCT_COLUMNS}
+        self.attributes = {name: self._load("attributes", name) for name in self.attribute_names}
+        self.offers = {name: self._load("offers", name) for name in OFFER_COLUMNS}
+
+    def _load(self, table: str, column: str) -> np.ndarray:
+        return np.load(os.path.join(self.path, f"{table}.{column}.npy"), mmap_mode="r")
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.built_at
+
+    def _offer_product_index(self):
+        # Products are stored sorted by id, so offers join on a binary search
+        product_ids = self.products["id"]
+        offer_product_ids = self.offers["product_id"]
+        if len(product_ids) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(len(offer_product_ids), dtype=bool)
+        index = np.searchsorted(product_ids, offer_product_ids)
+        index = np.clip(index, 0, len(product_ids) - 1)
+        matched = product_ids[index] == offer_product_ids
+        return index[matched], matched
+
+    def price_by_category(self) -> List[Dict]:
+        index, matched = self._offer_product_index()
+        prices = self.offers["price"][matched]
+        priced = ~np.isnan(prices)
+        codes = self.products["category"][index][priced]
+        prices = prices[priced]
+
+        size = len(self.categories)
+        counts = np.bincount(codes, minlength=size)
+        totals = np.bincount(codes, weights=prices, minlength=size)
+        minimums = np.full(size, np.inf)
+        maximums = np.full(size, -np.inf)
+        np.minimum.at(minimums, codes, prices)
+        np.maximum.at(maximums, codes, prices)
+
+        return [
+            {
+                "category": category,
+                "offer_count": int(counts[code]),
+                "avg_price": float(totals[code] / counts[code]),
+                "min_price": float(minimums[code]),
+                "max_price": float(maximums[code]),
+            }
+            for code, category in enumerate(self.categories)
+            if counts[code]
+        ]
+
+    def coverage_per_dollar_by_tier(self) -> List[Dict]:
+        index, matched = self._offer_product_index()
+        coverage = self.products["coverage_sqm"][index]
+        prices = self.offers["price"][matched]
+        tiers = self.offers["tier"][matched]
+
+        valid = (prices > 0) & ~np.isnan(coverage) & (tiers >= 0)
+        ratios = coverage[valid] / prices[valid]
+        codes = tiers[valid]
+
+        size = len(self.tiers)
+        counts = np.bincount(codes, minlength=size)
+        totals = np.bincount(codes, weights=ratios, minlength=size)
+
+        return [
+            {
+                "tier": tier,
+                "offer_count": int(counts[code]),
+                "avg_coverage_per_dollar": float(totals[code] / counts[code]),
+            }
+            for code, tier in enumerate(self.tiers)
+            if counts[code]
+        ]
+
+
+def build_snapshot(db: Session, directory: str = SNAPSHOT_DIR) -> CatalogSnapshot:
+    # Make sure offers carry a normalized price before they are compared
+    fx.ensure_rates(db)
+    product_rows = db.execute(
+        select(models.Product.id, models.Product.category, models.Product.attributes)
+        .order_by(models.Product.id)
+    ).all()
+    offer_rows = db.execute(
+        select(models.Offer.product_id, models.Offer.supplier_id, models.Offer.price_usd, models.Supplier.tier)
+        .join(models.Supplier, models.Offer.supplier_id == models.Supplier.id)
+    ).all()
+
+    categories = sorted({row.category for row in product_rows})
+    category_codes = {category: code for code, category in enumerate(categories)}
+    tier_codes = {tier: code for code, tier in enumerate(TIERS)}
+
+    products = {
+        "id": np.array([row.id for row in product_rows], dtype=np.int64),
+        "category": np.array([category_codes[row.category] for row in product_rows], dtype=np.int32),
+        "thickness_mm": np.array(
+            [_as_float((row.attributes or {}).get("thickness_mm")) for row in product_rows], dtype=np.float64
+        ),
+        "coverage_sqm": np.array(
+            [_as_float((row.attributes or {}).get("coverage_sqm")) for row in product_rows], dtype=np.float64
+        ),
+    }
+    attributes = {
+        name: np.array([_as_float((row.attributes or {}).get(name)) for row in product_rows], dtype=np.float64)
+        for name in SNAPSHOT_ATTRIBUTES
+    }
+    offers = {
+        "product_id": np.array([row.product_id for row in offer_rows], dtype=np.int64),
+        "supplier_id": np.array([row.supplier_id for row in offer_rows], dtype=np.int64),
+        "tier": np.array([tier_codes.get(row.tier, -1) for row in offer_rows], dtype=np.int8),
+        "price": np.array(
+            [np.nan if row.price_usd is None else row.price_usd for row in offer_rows], dtype=np.float64
+        ),
+    }
+
+    # Each build goes into its own directory and CURRENT is swapped last, so
+    # readers holding the previous memory maps are never affected
+    os.makedirs(directory, exist_ok=True)
+    built_at = time.time()
+    version = f"{int(built_at * 1000)}-{os.getpid()}"
+    path = os.path.join(directory, version)
+    os.makedirs(path)
+
+    for table, columns in (("products", products), ("attributes", attributes), ("offers", offers)):
+        for name, column in columns.items():
+            np.save(os.path.join(path, f"{table}.{name}.npy"), column)
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(
+            {
+                "built_at": built_at,
+                "categories": categories,
+                "tiers": TIERS,
+                "attributes": SNAPSHOT_ATTRIBUTES,
+                "product_count": len(product_rows),
+                "offer_count": len(offer_rows),
+            },
+            f,
+        )
+
+    pointer = os.path.join(directory, "CURRENT")
+    replaced = _read_pointer(directory)
+    # A slower build that started earlier must not move CURRENT backwards
+    if replaced is None or _version_key(replaced) < _version_key(version):
+        with open(f"{pointer}.{version}.tmp", "w") as f:
+            f.write(version)
+        os.replace(f"{pointer}.{version}.tmp", pointer)
+        if replaced is not None:
+            _prune_versions(directory, older_than=replaced)
+    return CatalogSnapshot(path)
+
+
+def _version_key(version: str):
+    built_at, _, pid = version.partition("-")
+    return int(built_at), pid
+
+
+def _read_pointer(directory: str) -> Optional[str]:
+    try:
+        with open(os.path.join(directory, "CURRENT")) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _prune_versions(directory: str, older_than: str):
+    # Only versions that were already superseded before this swap are removed:
+    # the replaced one may still be mapped by readers, and newer directories
+    # can belong to builds other workers are still writing
+    cutoff = _version_key(older_than)
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            superseded = _version_key(name) < cutoff
+        except ValueError:
+            continue
+        if superseded and os.path.isdir(path):
+            # Mapped files may still be open on some platforms; try again next build
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_snapshot(directory: str = SNAPSHOT_DIR) -> Optional[CatalogSnapshot]:
+    version = _read_pointer(directory)
+    if version is None:
+        return None
+    try:
+        return CatalogSnapshot(os.path.join(directory, version))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+_current: Optional[CatalogSnapshot] = None
+_lock = threading.Lock()
+
+
+def get_snapshot(db: Session, max_age_seconds: int = SNAPSHOT_TTL_SECONDS) -> CatalogSnapshot:
+    global _current
+    snapshot = _current
+    if snapshot is not None and snapshot.age_seconds < max_age_seconds:
+        return snapshot
+
+    with _lock:
+        if _current is None:
+            _current = load_snapshot()
+        if _current is None or _current.age_seconds >= max_age_seconds:
+            _current = build_snapshot(db)
+        return _current
+
+
+def refresh_snapshot(db: Session) -> CatalogSnapshot:
+    global _current
+    with _lock:
+        _current = build_snapshot(db)
+        return _current
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import func, desc
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .database import SessionLocal
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Bursts of events inside this interval collapse into a single recompute
+TRENDING_COALESCE_SECONDS = float(os.getenv("TRENDING_COALESCE_SECONDS", "1"))
+# Recompute even without local events: views age out of the window, and other
+# workers record events this process never hears about
+TRENDING_POLL_SECONDS = float(os.getenv("TRENDING_POLL_SECONDS", "30"))
+TRENDING_KEEPALIVE_SECONDS = float(os.getenv("TRENDING_KEEPALIVE_SECONDS", "15"))
+# Each window is its own channel and query, so the windows a client can ask for are capped
+TRENDING_MAX_WINDOW_HOURS = int(os.getenv("TRENDING_MAX_WINDOW_HOURS", "720"))
+# Largest limit a stream may ask for; channels compute this many rows
+TRENDING_MAX_LIMIT = 100
+
+
+def trending_products(db: Session, window_hours: int, limit: int) -> List[schemas.TrendingProduct]:
+    # Calculate time window
+    time_threshold = datetime.utcnow() - timedelta(hours=window_hours)
+
+    # Query trending products
+    trending = (
+        db.query(
+            models.Event.product_id,
+            models.Product.name,
+            models.Product.category,
+            func.count(models.Event.id).label('view_count')
+        )
+        .join(models.Product, models.Event.product_id == models.Product.id)
+        .filter(models.Event.timestamp >= time_threshold)
+        .group_by(models.Event.product_id, models.Product.name, models.Product.category)
+        .order_by(desc('view_count'))
+        .limit(limit)
+        .all()
+    )
+
+    return [
+        schemas.TrendingProduct(
+            product_id=row.product_id,
+            product_name=row.name,
+            category=row.category,
+            view_count=row.view_count
+        )
+        for row in trending
+    ]
+
+
+def _compute(window_hours: int, limit: int) -> List[dict]:
+    db = SessionLocal()
+    try:
+        return [row.model_dump() for row in trending_products(db, window_hours, limit)]
+    finally:
+        db.close()
+
+
+def ranking_diff(old: List[dict], new: List[dict]) -> Optional[dict]:
+    if old == new:
+        return None
+    old_by_id = {row["product_id"]: row for row in old}
+    new_ids = {row["product_id"] for row in new}
+    return {
+        "order": [row["product_id"] for row in new],
+        "upserted": [row for row in new if old_by_id.get(row["product_id"]) != row],
+        "removed": [product_id for product_id in old_by_id if product_id not in new_ids],
+    }
+
+
+class TrendingChannel:
+    # One channel per window: the ranking is computed once at the largest
+    # limit and cut down to each subscriber's own limit
+    def __init__(self, window_hours: int):
+        self.window_hours = window_hours
+        self.subscribers: Dict[asyncio.Queue, int] = {}
+        self.ranking: Optional[List[dict]] = None
+        self.changed = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+
+    def _message(self, kind: str, limit: int, body: dict) -> dict:
+        return {"event": kind, "data": {"window_hours": self.window_hours, "limit": limit, **body}}
+
+    def snapshot_message(self, limit: int) -> dict:
+        return self._message("snapshot", limit, {"ranking": self.ranking[:limit]})
+
+    def add(self, queue: asyncio.Queue, limit: int):
+        self.subscribers[queue] = limit
+        if self.ranking is not None:
+            queue.put_nowait(self.snapshot_message(limit))
+
+    def publish(self, old: Optional[List[dict]]):
+        for queue, limit in self.subscribers.items():
+            if old is None:
+                message = self.snapshot_message(limit)
+            else:
+                diff = ranking_diff(old[:limit], self.ranking[:limit])
+                if diff is None:
+                    continue
+                message = self._message("diff", limit, diff)
+            if queue.full():
+                # Slow consumer: it missed a diff, so replace whatever is
+                # pending with the full current ranking instead of queueing more
+                queue.get_nowait()
+                queue.put_nowait(self.snapshot_message(limit))
+            else:
+                queue.put_nowait(message)
+
+    async def _run(self):
+        while True:
+            # One query per change for the whole channel, however many subscribers
+            try:
+                ranking = await asyncio.to_thread(_compute, self.window_hours, TRENDING_MAX_LIMIT)
+            except Exception:
+                logger.exception("Failed to recompute trending for window %sh", self.window_hours)
+                await asyncio.sleep(TRENDING_POLL_SECONDS)
+                continue
+            old, self.ranking = self.ranking, ranking
+            if old != ranking:
+                self.publish(old)
+
+            await asyncio.sleep(TRENDING_COALESCE_SECONDS)
+            try:
+                await asyncio.wait_for(self.changed.wait(), timeout=TRENDING_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self.changed.clear()
+
+
+class TrendingBroadcaster:
+    def __init__(self):
+        self.channels: Dict[int, TrendingChannel] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, window_hours: int, limit: int) -> Tuple[TrendingChannel, asyncio.Queue]:
+        # The snapshot arrives on the queue once the channel has a ranking
+        self.loop = asyncio.get_running_loop()
+        channel = self.channels.get(window_hours)
+        if channel is None:
+            channel = self.channels[window_hours] = TrendingChannel(window_hours)
+        queue = asyncio.Queue(maxsize=1)
+        channel.add(queue, limit)
+        return channel, queue
+
+    def unsubscribe(self, channel: TrendingChannel, queue: asyncio.Queue):
+        channel.subscribers.pop(queue, None)
+        if not channel.subscribers:
+            channel.task.cancel()
+            if self.channels.get(channel.window_hours) is channel:
+                del self.channels[channel.window_hours]
+
+    def notify(self):
+        # Called from the threadpool when an event is recorded
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        for channel in list(self.channels.values()):
+            loop.call_soon_threadsafe(channel.changed.set)
+
+    async def stream(self, window_hours: int, limit: int):
+        channel, queue = self.subscribe(window_hours, limit)
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=TRENDING_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line keeps idle connections open through proxies,
+                    # also while the first ranking is still being computed
+                    yield ": keepalive\n\n"
+                    continue
+                yield _format(message)
+        finally:
+            self.unsubscribe(channel, queue)
+
+
+def _format(message: dict) -> str:
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+
+
+broadcaster = TrendingBroadcaster()
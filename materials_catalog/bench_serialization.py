@@ -0,0 +1,79 @@
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app import models, schemas
+from app.responses import FastJSONResponse, orjson
+
+PAGE_SIZES = [100, 1000, 10000]
+product_list = TypeAdapter(List[schemas.Product])
+
+
+def make_products(count):
+    created = datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        models.Product(
+            id=i + 1,
+            name=f"Product {i}",
+            category=["Acoustic", "Fireproofing", "Insulation"][i % 3],
+            attributes={
+                "thickness_mm": 10 + i % 90,
+                "coverage_sqm": 0.5 + (i % 20) / 4,
+                "material": "Glass Wool",
+                "color": "White",
+                "r_value": 3.5
+            },
+            created_at=created + timedelta(seconds=i, microseconds=i * 7)
+        )
+        for i in range(count)
+    ]
+
+
+def current_path(products, unit_system):
+    # What FastAPI 0.109 does for response_model=List[schemas.Product] under
+    # pydantic v2: build models, validate them again against the response
+    # field, field.serialize (dump_python in json mode), then json.dumps
+    items = [schemas.Product.from_orm_with_units(p, unit_system) for p in products]
+    validated = product_list.validate_python(items)
+    content = product_list.dump_python(validated, mode="json", by_alias=True)
+    return JSONResponse(content).body
+
+
+def fast_path(products, unit_system):
+    return FastJSONResponse([schemas.Product.dump_with_units(p, unit_system) for p in products]).body
+
+
+def timed(func, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    print(f"orjson: {'installed' if orjson else 'not installed (fast path uses json)'}")
+    print(f"{'rows':>6} {'units':>9} {'current ms':>11} {'fast ms':>9} {'speedup':>8}")
+    for size in PAGE_SIZES:
+        products = make_products(size)
+        for unit_system in schemas.UnitSystem:
+            current_time, current_body = timed(current_path, products, unit_system)
+            fast_time, fast_body = timed(fast_path, products, unit_system)
+            # Both paths must decode to the same fields and values; float
+            # spelling can differ (orjson writes 0.00001 where json writes 1e-05)
+            if json.loads(current_body) != json.loads(fast_body):
+                print(f"❌ Output differs for {size} rows ({unit_system.value})")
+                return 1
+            print(f"{size:>6} {unit_system.value:>9} {current_time * 1000:>11.1f} {fast_time * 1000:>9.1f} "
+                  f"{current_time / fast_time:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from sqlalchemy import insert, select, update
+
+from app.database import engine
+from app import models, schemas
+
+# Create tables
+models.Base.metadata.create_all(bind=engine)
+
+BASE_FIELDS = ("name", "category", "attributes")
+# CSV columns converted to numbers; every other cell stays a string, so an sku
+# like 000123 is kept as written
+NUMERIC_COLUMNS = ("thickness_mm", "coverage_sqm")
+FINGERPRINT_BYTES = 1024 * 1024
+
+
+class SourceChanged(Exception):
+    pass
+
+
+def _coerce(value):
+    # CSV cells arrive as strings; keep numbers numeric so thickness/coverage validate
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    # "nan" and "inf" parse as floats but can't be stored as JSON numbers
+    return number if math.isfinite(number) else value
+
+
+def _parse_record(record, numeric_columns=NUMERIC_COLUMNS):
+    if isinstance(record, str):
+        record = json.loads(record)
+        extra = {}
+    else:
+        extra = {
+            key: _coerce(value) if key in numeric_columns else value
+            for key, value in record.items()
+            if key not in BASE_FIELDS and key is not None and value not in (None, "")
+        }
+
+    if not isinstance(record, dict):
+        raise ValueError(f"expected an object, got {type(record).__name__}")
+
+    attributes = record.get("attributes") or {}
+    if isinstance(attributes, str):
+        attributes = json.loads(attributes)
+    if not isinstance(attributes, dict):
+        raise ValueError(f"attributes must be an object, got {type(attributes).__name__}")
+    attributes = {**extra, **attributes}
+
+    product = schemas.ProductCreate(
+        name=record.get("name"),
+        category=record.get("category"),
+        attributes=attributes
+    )
+    return {"name": product.name, "category": product.category, "attributes": product.attributes}
+
+
+def validate_batch(batch, numeric_columns=NUMERIC_COLUMNS):
+    # Runs in a worker process: parse and validate one batch of raw records
+    start, records = batch
+    rows, rejected = [], []
+    for offset, record in enumerate(records):
+        try:
+            rows.append(_parse_record(record, numeric_columns))
+        except Exception as e:
+            # A malformed record must not abort the run, or every resume
+            # would stop at the same place
+            rejected.append({"record": start + offset + 1, "error": str(e)})
+    return rows, rejected
+
+
+def read_records(path):
+    # Stream the file: CSV rows as dicts, JSON Lines as raw strings parsed by the workers
+    # utf-8-sig drops the byte order mark Excel puts in front of the first header
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if path.lower().endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield line
+
+
+def iter_batches(records, batch_size, start=0):
+    records = islice(records, start, None)
+    position = start
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield position, batch
+        position += len(batch)
+
+
+def file_fingerprint(path):
+    # Size plus a hash of the first and last MB: cheap on large files, and a
+    # replaced file with the same name is caught even when it is the same size
+    size = os.path.getsize(path)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if size > FINGERPRINT_BYTES:
+            f.seek(max(FINGERPRINT_BYTES, size - FINGERPRINT_BYTES))
+            digest.update(f.read())
+    return f"{size}:{digest.hexdigest()}"
+
+
+def load_checkpoint(conn, source, fingerprint):
+    table = models.ImportCheckpoint.__table__
+    row = conn.execute(select(table).where(table.c.source == source)).first()
+    if row is None:
+        conn.execute(insert(table).values(source=source, fingerprint=fingerprint, position=0,
+                                          rows_imported=0, rows_rejected=0))
+        return 0, 0, 0
+    if row.fingerprint != fingerprint:
+        if row.position and row.fingerprint is not None:
+            raise SourceChanged(
+                f"{source} has changed since it was last imported; "
+                "use --restart to import the new file from the beginning"
+            )
+        conn.execute(update(table).where(table.c.source == source).values(fingerprint=fingerprint))
+    return row.position, row.rows_imported, row.rows_rejected
+
+
+def save_checkpoint(conn, source, position, rows_imported, rows_rejected):
+    table = models.ImportCheckpoint.__table__
+    conn.execute(
+        update(table)
+        .where(table.c.source == source)
+        .values(position=position, rows_imported=rows_imported, rows_rejected=rows_rejected)
+    )
+
+
+def import_products(
+    path,
+    batch_size=5000,
+    commit_every=20,
+    workers=None,
+    restart=False,
+    rejects_path=None,
+    numeric_columns=NUMERIC_COLUMNS,
+    bind=engine,
+    report=print
+):
+    source = os.path.abspath(path)
+    fingerprint = file_fingerprint(path)
+    product_table = models.Product.__table__
+
+    with bind.begin() as conn:
+        if restart:
+            conn.execute(
+                models.ImportCheckpoint.__table__.delete()
+                .where(models.ImportCheckpoint.__table__.c.source == source)
+            )
+        position, imported, rejected = load_checkpoint(conn, source, fingerprint)
+
+    if position:
+        report(f"Resuming {path} after record {position} ({imported} already imported)")
+
+    started = time.monotonic()
+    imported_this_run = 0
+    pending_rows, pending_rejects, pending_batches = [], [], 0
+
+    def flush(new_position):
+        nonlocal position, imported, rejected, imported_this_run
+        # Rows and checkpoint commit together, so a crash never double-imports
+        with bind.begin() as conn:
+            if pending_rows:
+                conn.execute(insert(product_table), pending_rows)
+            save_checkpoint(conn, source, new_position, imported + len(pending_rows),
+                            rejected + len(pending_rejects))
+        if pending_rejects and rejects_path:
+            with open(rejects_path, "a", encoding="utf-8") as f:
+                for reject in pending_rejects:
+                    f.write(json.dumps(reject) + "\n")
+
+        position = new_position
+        imported += len(pending_rows)
+        rejected += len(pending_rejects)
+        imported_this_run += len(pending_rows)
+        elapsed = time.monotonic() - started
+        rate = imported_this_run / elapsed if elapsed else 0
+        report(f"{position} records read, {imported} imported, {rejected} rejected, {rate:.0f} rows/s")
+
+    workers = workers or os.cpu_count() or 1
+    # Keep a bounded number of batches in flight so workers validate ahead
+    # of the writer without reading the whole file into memory
+    max_in_flight = 2 * workers
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        batches = iter_batches(read_records(path), batch_size, start=position)
+        while True:
+            while len(in_flight) < max_in_flight:
+                batch = next(batches, None)
+                if batch is None:
+                    break
+                batch_start, records = batch
+                in_flight.append((batch_start + len(records), pool.submit(validate_batch, batch, numeric_columns)))
+            if not in_flight:
+                break
+
+            batch_end, future = in_flight.popleft()
+            rows, rejects = future.result()
+            pending_rows.extend(rows)
+            pending_rejects.extend(rejects)
+            pending_batches += 1
+            if pending_batches >= commit_every or not in_flight:
+                flush(batch_end)
+                pending_rows, pending_rejects, pending_batches = [], [], 0
+
+    return {"position": position, "imported": imported, "rejected": rejected}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import products from a CSV or JSON Lines file")
+    parser.add_argument("path", help="CSV file with name, category and attribute columns, or a .jsonl file")
+    parser.add_argument("--batch-size", type=int, default=5000, help="records validated per worker task")
+    parser.add_argument("--commit-every", type=int, default=20, help="batches written per transaction")
+    parser.add_argument("--workers", type=int, default=None, help="parsing worker processes (default: CPU count)")
+    parser.add_argument("--rejects", default=None, help="append rejected records to this JSON Lines file")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore the saved checkpoint and import the file from the beginning")
+    parser.add_argument("--numeric", default=",".join(NUMERIC_COLUMNS),
+                        help="comma separated CSV columns stored as numbers (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    try:
+        result = import_products(
+            args.path,
+            batch_size=args.batch_size,
+            commit_every=args.commit_every,
+            workers=args.workers,
+            restart=args.restart,
+            rejects_path=args.rejects,
+            numeric_columns=tuple(name.strip() for name in args.numeric.split(",") if name.strip())
+        )
+    except SourceChanged as e:
+        print(f"❌ {e}")
+        return 1
+    except Exception as e:
+        print(f"❌ Import stopped: {e}")
+        print("Run the same command again to resume from the last checkpoint.")
+        return 1
+
+    print(f"✅ Imported {result['imported']} products ({result['rejected']} rejected)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
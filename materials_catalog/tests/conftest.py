@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway database and snapshot directory before it is
+# imported, so the suite never touches ./materials.db
+_test_dir = tempfile.mkdtemp(prefix="materials_catalog_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_test_dir, 'test.db')}"
+os.environ["SNAPSHOT_DIR"] = os.path.join(_test_dir, "snapshots")
+os.environ.pop("SLOW_QUERY_LOG", None)
+# The seeded admin account may use the admin-only endpoints
+os.environ["ADMIN_EMAILS"] = "admin@example.com"
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    import seed_data
+    
+    # Tests rely on the seeded accounts, products 1-6, both suppliers and their offers
+    seed_data.seed_data()
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,59 @@
+from fastapi.testclient import TestClient
+import json
+
+from app import auth, database
+
+def test_slow_query_log(client: TestClient, tmp_path, monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_EMAILS", {"admin@example.com"})
+    login_response = client.post("/api/login", json={
+        "email": "admin@example.com",
+        "password": "secret"
+    })
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    
+    log_path = tmp_path / "slow.jsonl"
+    # Threshold 0 logs every statement
+    database.enable_slow_query_log(str(log_path), threshold_ms=0)
+    try:
+        for _ in range(3):
+            response = client.get("/api/products?category=Acoustic&supplier_tier=tier_1")
+            assert response.status_code == 200
+        
+        entries = [json.loads(line) for line in log_path.read_text().splitlines()]
+        product_queries = [e for e in entries if e["route"] == "GET /api/products" and "FROM products" in e["statement"]]
+        assert len(product_queries) == 3
+        assert product_queries[0]["params"] == ["str", "str", "int", "int"]
+        assert product_queries[0]["plan"]
+        
+        response = client.get("/api/admin/slow-queries?limit=100", headers=headers)
+        assert response.status_code == 200
+        top = response.json()
+        assert top == sorted(top, key=lambda row: row["total_ms"], reverse=True)
+        row = next(r for r in top if r["statement"] == product_queries[0]["statement"])
+        assert row["calls"] == 3
+        assert row["routes"] == ["GET /api/products"]
+    finally:
+        database.disable_slow_query_log()
+    
+    response = client.get("/api/admin/slow-queries", headers=headers)
+    assert response.status_code == 404
+
+def test_slow_queries_require_admin(client: TestClient, monkeypatch):
+    # Anyone can register, so a plain login is not enough
+    client.post("/api/register", json={"email": "not-an-admin@example.com", "password": "secret"})
+    login_response = client.post("/api/login", json={
+        "email": "not-an-admin@example.com",
+        "password": "secret"
+    })
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    response = client.get("/api/admin/slow-queries", headers=headers)
+    assert response.status_code == 403
+    
+    # No allow-list means nobody is an admin
+    monkeypatch.setattr(auth, "ADMIN_EMAILS", set())
+    login_response = client.post("/api/login", json={
+        "email": "admin@example.com",
+        "password": "secret"
+    })
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    assert client.get("/api/admin/slow-queries", headers=headers).status_code == 403
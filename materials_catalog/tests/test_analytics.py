@@ -1,6 +1,7 @@
 from fastapi.testclient import TestClient
 from datetime import datetime, timedelta
 import time
+import json
 
 def test_trending_products(client: TestClient):
     # First record some events
@@ -24,4 +25,121 @@ def test_trending_products(client: TestClient):
     # Product 1 should have 3 views
     product_1 = next((p for p in trending if p["product_id"] == 1), None)
     if product_1:
-        assert product_1["view_count"] >= 3
\ No newline at end of file
+        assert product_1["view_count"] >= 3
+
+def test_snapshot_aggregations(client: TestClient):
+    login_response = client.post("/api/login", json={
+        "email": "admin@example.com",
+        "password": "secret"
+    })
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    
+    # Only admins may force a rebuild
+    client.post("/api/register", json={"email": "snapshot-user@example.com", "password": "secret"})
+    user_login = client.post("/api/login", json={"email": "snapshot-user@example.com", "password": "secret"})
+    user_headers = {"Authorization": f"Bearer {user_login.json()['access_token']}"}
+    assert client.post("/api/insights/snapshot", headers=user_headers).status_code == 403
+    
+    # Rebuild the snapshot so it reflects the current catalog
+    response = client.post("/api/insights/snapshot", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["offer_count"] > 0
+    
+    response = client.get("/api/insights/price-by-category")
+    assert response.status_code == 200
+    stats = response.json()
+    assert len(stats) > 0
+    for row in stats:
+        assert row["min_price"] <= row["avg_price"] <= row["max_price"]
+    
+    response = client.get("/api/insights/coverage-per-dollar")
+    assert response.status_code == 200
+    tiers = {row["tier"] for row in response.json()}
+    assert tiers <= {"tier_1", "tier_2"}
+
+def test_trending_stream_diffs(client: TestClient, monkeypatch):
+    import asyncio
+    from app import trending
+    
+    monkeypatch.setattr(trending, "TRENDING_COALESCE_SECONDS", 0.01)
+    monkeypatch.setattr(trending, "TRENDING_POLL_SECONDS", 5)
+    
+    async def scenario():
+        broadcaster = trending.TrendingBroadcaster()
+        first = broadcaster.stream(24, 100)
+        second = broadcaster.stream(24, 100)
+        
+        # Every subscriber starts from a full snapshot of the same channel
+        snapshot_1 = await first.__anext__()
+        snapshot_2 = await second.__anext__()
+        assert snapshot_1.startswith("event: snapshot")
+        assert snapshot_1 == snapshot_2
+        assert len(broadcaster.channels) == 1
+        
+        # Other limits share the window's channel and get their own cut of it
+        top = broadcaster.stream(24, 1)
+        snapshot_top = await top.__anext__()
+        assert len(json.loads(snapshot_top.split("data: ", 1)[1])["ranking"]) == 1
+        assert len(broadcaster.channels) == 1
+        await top.aclose()
+        
+        response = await asyncio.to_thread(client.post, "/api/events", json={"product_id": 2, "session_id": "stream_session"})
+        assert response.status_code == 200
+        broadcaster.notify()
+        
+        diff = await asyncio.wait_for(first.__anext__(), timeout=5)
+        assert diff.startswith("event: diff")
+        assert '"product_id": 2' in diff
+        assert await asyncio.wait_for(second.__anext__(), timeout=5) == diff
+        
+        await first.aclose()
+        await second.aclose()
+        assert broadcaster.channels == {}
+    
+    asyncio.run(scenario())
+
+def test_trending_stream_keepalive_before_first_ranking(client: TestClient, monkeypatch):
+    import asyncio
+    from app import trending
+    
+    def failing_compute(window_hours, limit):
+        raise RuntimeError("database unavailable")
+    
+    monkeypatch.setattr(trending, "_compute", failing_compute)
+    monkeypatch.setattr(trending, "TRENDING_KEEPALIVE_SECONDS", 0.01)
+    
+    async def scenario():
+        broadcaster = trending.TrendingBroadcaster()
+        stream = broadcaster.stream(24, 5)
+        assert await asyncio.wait_for(stream.__anext__(), timeout=5) == ": keepalive\n\n"
+        await stream.aclose()
+        assert broadcaster.channels == {}
+    
+    asyncio.run(scenario())
+    
+    response = client.get(f"/api/insights/trending/stream?window_hours={trending.TRENDING_MAX_WINDOW_HOURS + 1}")
+    assert response.status_code == 422
+
+def test_related_products(client: TestClient):
+    # Seeded sessions already pair up products at random, so compare against them
+    before = {r["product_id"]: r["co_view_count"] for r in client.get("/api/products/4/related?limit=100").json()}
+    
+    # Products 4 and 5 are viewed together in several sessions, 6 only once
+    for session in ("related_a", "related_b", "related_c"):
+        client.post("/api/events", json={"product_id": 4, "session_id": session})
+        client.post("/api/events", json={"product_id": 5, "session_id": session})
+    client.post("/api/events", json={"product_id": 6, "session_id": "related_a"})
+    # Repeat views in the same session are not double counted
+    client.post("/api/events", json={"product_id": 5, "session_id": "related_a"})
+    
+    response = client.get("/api/products/4/related?limit=100")
+    assert response.status_code == 200
+    related = response.json()
+    counts = {r["product_id"]: r["co_view_count"] for r in related}
+    assert counts[5] == before.get(5, 0) + 3
+    assert counts[6] == before.get(6, 0) + 1
+    assert 4 not in counts
+    assert [r["co_view_count"] for r in related] == sorted(counts.values(), reverse=True)
+    
+    response = client.get("/api/products/999999/related")
+    assert response.status_code == 404
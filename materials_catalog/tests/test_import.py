@@ -0,0 +1,122 @@
+from fastapi.testclient import TestClient
+import json
+
+import pytest
+
+import import_catalog
+
+def test_bulk_import_resumes_from_checkpoint(client: TestClient, tmp_path):
+    path = tmp_path / "products.csv"
+    lines = ["name,category,thickness_mm,coverage_sqm,material"]
+    for i in range(25):
+        lines.append(f"Imported Board {i},ImportTest,{10 + i},2.5,Gypsum")
+    # Missing coverage_sqm, must be rejected
+    lines.append("Broken Board,ImportTest,12,,Gypsum")
+    path.write_text("\n".join(lines) + "\n")
+    
+    result = import_catalog.import_products(str(path), batch_size=10, commit_every=1, workers=2, report=lambda _: None)
+    assert result == {"position": 26, "imported": 25, "rejected": 1}
+    
+    response = client.get("/api/products?category=ImportTest&limit=100")
+    assert response.status_code == 200
+    products = response.json()
+    assert len(products) == 25
+    assert products[0]["thickness_mm"] == 10.0
+    assert products[0]["attributes"]["material"] == "Gypsum"
+    
+    # Running the same file again is a no-op
+    result = import_catalog.import_products(str(path), batch_size=10, workers=2, report=lambda _: None)
+    assert result["imported"] == 25
+    response = client.get("/api/products?category=ImportTest&limit=100")
+    assert len(response.json()) == 25
+
+def test_bulk_import_json_lines(client: TestClient, tmp_path):
+    path = tmp_path / "products.jsonl"
+    records = [
+        {"name": "JSON Panel", "category": "ImportJsonTest", "attributes": {"thickness_mm": 40, "coverage_sqm": 1.0}},
+        {"name": "JSON Panel Broken", "category": "ImportJsonTest", "attributes": {"thickness_mm": 40}},
+    ]
+    path.write_text("\n".join(json.dumps(r) for r in records) + "\n")
+    
+    result = import_catalog.import_products(str(path), workers=1, report=lambda _: None)
+    assert result["imported"] == 1
+    assert result["rejected"] == 1
+
+def test_bulk_import_rejects_malformed_json(client: TestClient, tmp_path):
+    path = tmp_path / "malformed.jsonl"
+    lines = [
+        json.dumps([1, 2]),
+        json.dumps("just a string"),
+        json.dumps({"name": "Bad Attributes", "category": "ImportMalformedTest", "attributes": [1, 2]}),
+        "{not json",
+        json.dumps({"name": "Good Panel", "category": "ImportMalformedTest",
+                    "attributes": {"thickness_mm": 25, "coverage_sqm": 1.5}}),
+    ]
+    path.write_text("\n".join(lines) + "\n")
+    
+    result = import_catalog.import_products(str(path), workers=1, report=lambda _: None)
+    assert result == {"position": 5, "imported": 1, "rejected": 4}
+
+def test_bulk_import_resumes_after_interruption(client: TestClient, tmp_path, monkeypatch):
+    path = tmp_path / "interrupted.csv"
+    lines = ["name,category,thickness_mm,coverage_sqm"]
+    for i in range(30):
+        lines.append(f"Resumed Board {i},ImportResumeTest,{10 + i},2.5")
+    path.write_text("\n".join(lines) + "\n")
+    
+    # Fail the second commit, after the first 10 records are stored
+    save_checkpoint = import_catalog.save_checkpoint
+    calls = []
+    def failing_save_checkpoint(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise RuntimeError("connection lost")
+        save_checkpoint(*args)
+    monkeypatch.setattr(import_catalog, "save_checkpoint", failing_save_checkpoint)
+    
+    with pytest.raises(RuntimeError):
+        import_catalog.import_products(str(path), batch_size=10, commit_every=1, workers=1, report=lambda _: None)
+    response = client.get("/api/products?category=ImportResumeTest&limit=100")
+    assert len(response.json()) == 10
+    
+    monkeypatch.setattr(import_catalog, "save_checkpoint", save_checkpoint)
+    result = import_catalog.import_products(str(path), batch_size=10, commit_every=1, workers=1, report=lambda _: None)
+    assert result == {"position": 30, "imported": 30, "rejected": 0}
+    
+    response = client.get("/api/products?category=ImportResumeTest&limit=100")
+    names = sorted(p["name"] for p in response.json())
+    assert names == sorted(f"Resumed Board {i}" for i in range(30))
+
+def test_bulk_import_refuses_changed_file(client: TestClient, tmp_path):
+    path = tmp_path / "monthly.csv"
+    path.write_text("name,category,thickness_mm,coverage_sqm\n" + "".join(
+        f"A{i},ImportMonthlyTest,{10 + i},2.5\n" for i in range(10)
+    ))
+    result = import_catalog.import_products(str(path), workers=1, report=lambda _: None)
+    assert result["imported"] == 10
+    
+    # Next month's file reuses the name: resuming would skip its first 10 rows
+    path.write_text("name,category,thickness_mm,coverage_sqm\n" + "".join(
+        f"B{i},ImportMonthlyTest,{10 + i},2.5\n" for i in range(12)
+    ))
+    with pytest.raises(import_catalog.SourceChanged):
+        import_catalog.import_products(str(path), workers=1, report=lambda _: None)
+    
+    result = import_catalog.import_products(str(path), workers=1, restart=True, report=lambda _: None)
+    assert result == {"position": 12, "imported": 12, "rejected": 0}
+    names = {p["name"] for p in client.get("/api/products?category=ImportMonthlyTest&limit=100").json()}
+    assert {f"B{i}" for i in range(12)} <= names
+
+def test_bulk_import_keeps_text_columns(client: TestClient, tmp_path):
+    path = tmp_path / "excel.csv"
+    # Excel writes a byte order mark before the first header
+    path.write_text("name,category,thickness_mm,coverage_sqm,sku,grade\n"
+                    "Excel Board,ImportExcelTest,12,2.5,000123,nan\n", encoding="utf-8-sig")
+    
+    result = import_catalog.import_products(str(path), workers=1, report=lambda _: None)
+    assert result["imported"] == 1
+    product = client.get("/api/products?category=ImportExcelTest").json()[0]
+    assert product["name"] == "Excel Board"
+    assert product["attributes"]["sku"] == "000123"
+    assert product["attributes"]["grade"] == "nan"
+    assert product["thickness_mm"] == 12.0
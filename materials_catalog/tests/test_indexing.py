@@ -0,0 +1,63 @@
+from fastapi.testclient import TestClient
+import threading
+import time
+
+from app.indexing import RebuildableIndex
+
+class ListIndex(RebuildableIndex):
+    # Index over a list of "rows", standing in for the facet and co-view indexes
+    def __init__(self, rows, during_load=None):
+        super().__init__()
+        self.rows = rows
+        self.during_load = during_load
+        self.items = set()
+        self.loads = 0
+    
+    def add(self, item):
+        with self._lock:
+            self._remember(item)
+            self.items.add(item)
+    
+    def _load(self, db):
+        self.loads += 1
+        loaded = set(self.rows)
+        if self.during_load:
+            self.during_load()
+        return loaded
+    
+    def _install(self, loaded, pending):
+        self.items = loaded | {item for (item,) in pending}
+
+def test_rebuild_replays_hooks_made_during_load(client: TestClient):
+    # A write committed after the rows were read, but before the swap
+    index = ListIndex(["a"], during_load=lambda: index.add("b"))
+    index.rebuild(None)
+    assert index.items == {"a", "b"}
+    assert index.built_at > 0
+    
+    # Hooks outside a rebuild are not kept around
+    index.during_load = None
+    index.add("c")
+    assert index._pending is None
+
+def test_stale_index_rebuilds_once_in_background(client: TestClient, monkeypatch):
+    from app import indexing
+    
+    release = threading.Event()
+    index = ListIndex(["a"])
+    index.rebuild(None)
+    index.rows = ["a", "z"]
+    index.during_load = release.wait
+    # Background rebuilds open their own session
+    monkeypatch.setattr(indexing, "SessionLocal", lambda: type("Session", (), {"close": lambda self: None})())
+    
+    # Stale requests keep serving the current index and start a single rebuild
+    for _ in range(5):
+        index.ensure_fresh(None, max_age_seconds=0)
+    assert index.items == {"a"}
+    release.set()
+    deadline = time.time() + 5
+    while index.items != {"a", "z"} and time.time() < deadline:
+        time.sleep(0.01)
+    assert index.items == {"a", "z"}
+    assert index.loads == 2
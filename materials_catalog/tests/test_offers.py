@@ -0,0 +1,116 @@
+from fastapi.testclient import TestClient
+import json
+
+import pytest
+
+def test_offers_compared_in_one_currency(client: TestClient):
+    login_response = client.post("/api/login", json={
+        "email": "admin@example.com",
+        "password": "secret"
+    })
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    
+    product = client.post("/api/products", json={
+        "name": "FX Board",
+        "category": "FxTest",
+        "attributes": {"thickness_mm": 12.0, "coverage_sqm": 3.0}
+    }, headers=headers).json()
+    
+    rates = client.get("/api/fx/rates").json()
+    assert rates["base"] == "USD"
+    eur = rates["usd_per_unit"]["EUR"]
+    gbp = rates["usd_per_unit"]["GBP"]
+    
+    prices = [(100.0, "EUR"), (90.0, "GBP"), (105.0, "USD"), (1.0, "XYZ")]
+    for price, currency in prices:
+        response = client.post("/api/offers", json={
+            "product_id": product["id"],
+            "supplier_id": 1,
+            "price": price,
+            "currency": currency
+        }, headers=headers)
+        assert response.status_code == 200
+    assert response.json()["price_usd"] is None
+    
+    response = client.get(f"/api/products/{product['id']}/offers?currency=EUR")
+    assert response.status_code == 200
+    offers = response.json()
+    
+    # Offers without an FX rate can't be compared and are left out
+    assert [o["currency"] for o in offers] == sorted(
+        ["EUR", "GBP", "USD"], key=lambda c: {"EUR": 100.0 * eur, "GBP": 90.0 * gbp, "USD": 105.0}[c]
+    )
+    assert all(o["converted_currency"] == "EUR" for o in offers)
+    eur_offer = next(o for o in offers if o["currency"] == "EUR")
+    assert eur_offer["converted_price"] == 100.0
+    assert eur_offer["price_usd"] == 100.0 * eur
+    
+    response = client.get(f"/api/products/{product['id']}/offers?currency=XYZ")
+    assert response.status_code == 400
+
+def test_fx_without_rates_and_stale_reload(client: TestClient, tmp_path, monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app import fx, models
+    
+    engine = create_engine(f"sqlite:///{tmp_path / 'fx.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        # No rates file: offers are stored without a normalized price
+        monkeypatch.setattr(fx, "FX_RATES_FILE", str(tmp_path / "missing.json"))
+        assert fx.ensure_rates(db) is None
+        offer = models.Offer(product_id=1, supplier_id=1, price=10.0, currency="EUR")
+        fx.normalize_offer(db, offer)
+        assert offer.price_usd is None and offer.fx_version is None
+        assert fx.convert(db, 5.0, "USD", "usd") == 5.0
+        
+        old = tmp_path / "old.json"
+        old.write_text(json.dumps({"version": "fx-test-1", "usd_per_unit": {"EUR": 1.1}}))
+        new = tmp_path / "new.json"
+        new.write_text(json.dumps({"version": "fx-test-2", "usd_per_unit": {"EUR": 1.2}}))
+        assert fx.load_rates_file(db, str(old)) == "fx-test-1"
+        assert fx.load_rates_file(db, str(new)) == "fx-test-2"
+        # Reloading the current version is a no-op, an older one is refused
+        assert fx.load_rates_file(db, str(new)) == "fx-test-2"
+        with pytest.raises(ValueError):
+            fx.load_rates_file(db, str(old))
+        assert fx.current_version(db) == "fx-test-2"
+        
+        # Rates are divided by, so zero or negative ones are refused
+        bad = tmp_path / "bad.json"
+        bad.write_text(json.dumps({"version": "fx-test-3", "usd_per_unit": {"JPY": 0}}))
+        with pytest.raises(ValueError):
+            fx.load_rates_file(db, str(bad))
+        
+        # Two workers storing the same first version: the one that loses the race
+        # sees the other's rows and uses them
+        racing = tmp_path / "racing.json"
+        racing.write_text(json.dumps({"version": "fx-test-4", "usd_per_unit": {"EUR": 1.3}}))
+        other = sessionmaker(bind=engine)()
+        execute = db.execute
+        def execute_after_other_worker(statement, *args, **kwargs):
+            if str(statement).startswith("INSERT INTO fx_rates"):
+                fx.load_rates_file(other, str(racing))
+            return execute(statement, *args, **kwargs)
+        db.execute = execute_after_other_worker
+        try:
+            assert fx.load_rates_file(db, str(racing)) == "fx-test-4"
+        finally:
+            db.execute = execute
+            other.close()
+        assert fx.current_version(db) == "fx-test-4"
+    finally:
+        db.close()
+
+def test_fx_reload_requires_admin(client: TestClient):
+    client.post("/api/register", json={"email": "fx-user@example.com", "password": "secret"})
+    login_response = client.post("/api/login", json={"email": "fx-user@example.com", "password": "secret"})
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    assert client.post("/api/fx/reload", headers=headers).status_code == 403
+    
+    login_response = client.post("/api/login", json={"email": "admin@example.com", "password": "secret"})
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    response = client.post("/api/fx/reload", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["base"] == "USD"
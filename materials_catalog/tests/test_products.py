@@ -56,4 +56,162 @@ def test_unit_conversion(client: TestClient):
             assert "coverage_sqm" in imperial_product
             # And converted fields
             assert "thickness_in" in imperial_product
-            assert "coverage_sqft" in imperial_product
\ No newline at end of file
+            assert "coverage_sqft" in imperial_product
+
+def test_product_facets(client: TestClient, monkeypatch):
+    login_response = client.post("/api/login", json={
+        "email": "admin@example.com",
+        "password": "secret"
+    })
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    
+    response = client.get("/api/products/facets")
+    assert response.status_code == 200
+    before = response.json()
+    
+    # Writes update the facet counters directly
+    supplier = client.post("/api/suppliers", json={
+        "name": "Facet Supplier",
+        "tier": "tier_1",
+        "tags": ["facet_tag"]
+    }, headers=headers).json()
+    product = client.post("/api/products", json={
+        "name": "Facet Panel",
+        "category": "FacetCategory",
+        "attributes": {"thickness_mm": 30.0, "coverage_sqm": 2.0, "material": "Cork", "sku": "FP-0001"}
+    }, headers=headers).json()
+    response = client.post("/api/offers", json={
+        "product_id": product["id"],
+        "supplier_id": supplier["id"],
+        "price": 42.0
+    }, headers=headers)
+    assert response.status_code == 200
+    
+    facets = client.get("/api/products/facets").json()
+    assert facets["total"] == before["total"] + 1
+    assert facets["categories"]["FacetCategory"] == 1
+    assert facets["tags"]["facet_tag"] == 1
+    assert facets["tiers"]["tier_1"] == before["tiers"].get("tier_1", 0) + 1
+    assert facets["attributes"]["thickness_mm"]["25-50"] >= 1
+    
+    # Counts are narrowed to the current filter set
+    facets = client.get("/api/products/facets?supplier_tag=facet_tag").json()
+    assert facets["total"] == 1
+    assert facets["categories"] == {"FacetCategory": 1}
+    assert facets["attributes"]["material"] == {"Cork": 1}
+    # Only allow-listed text attributes become facets
+    assert "sku" not in facets["attributes"]
+    
+    listed = client.get("/api/products?supplier_tier=tier_1&supplier_tag=facet_tag").json()
+    facets = client.get("/api/products/facets?supplier_tier=tier_1&supplier_tag=facet_tag").json()
+    assert facets["total"] == len({p["id"] for p in listed})
+    
+    # Each attribute returns its most frequent values only
+    from app import facets as facet_index
+    monkeypatch.setattr(facet_index, "FACET_MAX_VALUES", 1)
+    materials = client.get("/api/products/facets").json()["attributes"]["material"]
+    assert len(materials) == 1
+
+def test_fast_response_matches_validated_response(client: TestClient, monkeypatch):
+    from app import responses
+    
+    for unit_system in ("metric", "imperial"):
+        url = f"/api/products?unit_system={unit_system}&limit=1000"
+        monkeypatch.setattr(responses, "FAST_RESPONSES", True)
+        fast = client.get(url)
+        monkeypatch.setattr(responses, "FAST_RESPONSES", False)
+        validated = client.get(url)
+        assert fast.status_code == validated.status_code == 200
+        # Same fields and values; float spelling may differ between encoders
+        assert fast.json() == validated.json()
+
+def test_product_document(client: TestClient):
+    login_response = client.post("/api/login", json={
+        "email": "admin@example.com",
+        "password": "secret"
+    })
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    
+    product = client.post("/api/products", json={
+        "name": "Document Panel",
+        "category": "DocumentTest",
+        "attributes": {"thickness_mm": 50.8, "coverage_sqm": 1.0}
+    }, headers=headers).json()
+    
+    response = client.get(f"/api/products/{product['id']}")
+    assert response.status_code == 200
+    document = response.json()
+    assert {k: document[k] for k in product} == product
+    assert document["best_offer"] is None
+    assert document["suppliers"] == []
+    
+    # New offers re-render the stored document
+    for price in (80.0, 60.0):
+        client.post("/api/offers", json={
+            "product_id": product["id"],
+            "supplier_id": 1,
+            "price": price
+        }, headers=headers)
+    document = client.get(f"/api/products/{product['id']}?unit_system=imperial").json()
+    assert document["best_offer"]["price"] == 60.0
+    assert document["suppliers"][0]["id"] == 1
+    assert document["suppliers"][0]["offer_count"] == 2
+    assert document["thickness_in"] == 2.0
+    
+    response = client.get("/api/products/999999")
+    assert response.status_code == 404
+
+def test_product_document_render_failure(client: TestClient, monkeypatch):
+    from app import documents, schemas
+    from app.database import SessionLocal
+    
+    login_response = client.post("/api/login", json={
+        "email": "admin@example.com",
+        "password": "secret"
+    })
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    product = client.post("/api/products", json={
+        "name": "Fragile Document Panel",
+        "category": "DocumentTest",
+        "attributes": {"thickness_mm": 20.0, "coverage_sqm": 1.0}
+    }, headers=headers).json()
+    assert client.get(f"/api/products/{product['id']}").json()["best_offer"] is None
+    
+    # The offer is saved even when its document can't be rendered, and the
+    # stale document is dropped rather than served
+    render = documents.render
+    def failing_render(*args):
+        raise RuntimeError("render failed")
+    monkeypatch.setattr(documents, "render", failing_render)
+    response = client.post("/api/offers", json={
+        "product_id": product["id"],
+        "supplier_id": 1,
+        "price": 15.0
+    }, headers=headers)
+    assert response.status_code == 200
+    db = SessionLocal()
+    try:
+        assert documents.get(db, product["id"], schemas.UnitSystem.metric) is None
+    finally:
+        db.close()
+    
+    monkeypatch.setattr(documents, "render", render)
+    response = client.get(f"/api/products/{product['id']}")
+    assert response.status_code == 200
+    assert response.json()["best_offer"]["price"] == 15.0
+    
+    # Storing over an existing document from another session is an upsert
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        bodies = {unit_system: b"{}" for unit_system in schemas.UnitSystem}
+        documents.store(first, product["id"], bodies)
+        documents.store(second, product["id"], bodies)
+        assert documents.get(first, product["id"], schemas.UnitSystem.imperial) == b"{}"
+        
+        # A read that rendered before a write committed leaves the newer document alone
+        stale = {unit_system: b"[]" for unit_system in schemas.UnitSystem}
+        documents.store(second, product["id"], stale, replace=False)
+        assert documents.get(first, product["id"], schemas.UnitSystem.imperial) == b"{}"
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,72 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.ratelimit import RateLimitMiddleware, LoadShedder
+
+def test_rate_limit_per_route_class(client: TestClient):
+    limited = TestClient(RateLimitMiddleware(app, limits={
+        "read": (0.001, 2),
+        "write": (0.001, 1),
+        "events": (0.001, 1),
+    }, enabled=True))
+    
+    assert limited.get("/api/products").status_code == 200
+    assert limited.get("/api/products").status_code == 200
+    response = limited.get("/api/products")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    
+    # Events have their own budget
+    response = limited.post("/api/events", json={"product_id": 1, "session_id": "limited"})
+    assert response.status_code == 200
+    assert limited.post("/api/events", json={"product_id": 1, "session_id": "limited"}).status_code == 429
+    
+    # Headers the caller controls do not get a fresh budget
+    response = limited.get("/api/products", headers={"X-Session-ID": "other"})
+    assert response.status_code == 429
+    response = limited.get("/api/products", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 429
+
+def test_rate_limit_per_user_within_address(client: TestClient):
+    login_response = client.post("/api/login", json={
+        "email": "admin@example.com",
+        "password": "secret"
+    })
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    limited = RateLimitMiddleware(app, limits={
+        "read": (0.001, 2),
+        "write": (0.001, 1),
+        "events": (0.001, 1),
+    }, enabled=True)
+    first = TestClient(limited, headers=headers)
+    
+    assert first.get("/api/products").status_code == 200
+    assert first.get("/api/products").status_code == 200
+    assert first.get("/api/products").status_code == 429
+    # The user's budget follows them to another address
+    limited.buckets["ip"].clear()
+    assert first.get("/api/products").status_code == 429
+    # ...and a request the user bucket rejects is not charged to the new address
+    anonymous = TestClient(limited)
+    assert anonymous.get("/api/products").status_code == 200
+    assert anonymous.get("/api/products").status_code == 200
+    assert anonymous.get("/api/products").status_code == 429
+
+def test_load_shedding(client: TestClient):
+    shedder = LoadShedder(max_in_flight=2, min_in_flight=1, target_latency_ms=1000)
+    # Shedding stays on with rate limiting off
+    shedding = TestClient(RateLimitMiddleware(app, shedder=shedder, enabled=False))
+    
+    assert shedding.get("/api/products").status_code == 200
+    assert shedder.in_flight == 0
+    
+    # Simulate a full server
+    shedder.in_flight = 2
+    response = shedding.get("/api/products")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    
+    # Slow requests shrink the concurrency limit
+    shedder.in_flight = 1
+    shedder.release(5.0)
+    assert shedder.limit < 2